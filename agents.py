@@ -1,50 +1,169 @@
-import os
-from dotenv import load_dotenv
+import asyncio
+import threading
+from contextlib import contextmanager
 from crewai import Agent, Task, Crew, Process
-from langchain_groq import ChatGroq
+from langchain_core.messages import SystemMessage, HumanMessage
+import config
+from pool import ResourcePool
+from llm_dispatcher import get_llm_dispatcher
+from llm_providers import create_chat_model
 
-# Load API key directly from environment
-load_dotenv()
-groq_api_key = os.getenv('GROQ_API_KEY')
+# Chat models are created on first use, so importing this module needs
+# neither network access nor an API key
+_llms = {}
+_llms_lock = threading.Lock()
 
-# Validate API key
-if not groq_api_key:
-    raise ValueError("GROQ_API_KEY not found. Please set it in your .env file or environment variables.")
+def get_llm(for_crew=False):
+    """Return the process-wide chat model for direct calls, or for CrewAI agents"""
+    llm = _llms.get(for_crew)
+    if llm is None:
+        with _llms_lock:
+            llm = _llms.get(for_crew)
+            if llm is None:
+                llm = _llms[for_crew] = create_chat_model(for_crew)
+    return llm
 
-# Initialize LLM with explicit API key
-llm = ChatGroq(
-    model="groq/llama3-8b-8192",
-    api_key=groq_api_key
-)
+# Agent personas and tasks per role, shared by the crew and direct paths.
+# "{question}" in a task description is filled in from the kickoff inputs.
+AGENT_PROFILES = {
+    "reservation": {
+        "role": "Reservation Manager",
+        "goal": "Handle restaurant reservations efficiently.",
+        "backstory": "You are responsible for taking reservations, checking table availability, and managing booking requests.",
+    },
+    "inquiry": {
+        "role": "Customer Support",
+        "goal": "Provide answers about restaurant policies, menu, and general inquiries.",
+        "backstory": "You are an expert in restaurant policies and menu details, assisting customers with accurate information.",
+    },
+}
+TASK_PROFILES = {
+    "reservation": {
+        "description": "Process the reservation request and respond appropriately: {question}",
+        "expected_output": "A response confirming the reservation status.",
+    },
+    "inquiry": {
+        "description": "Answer the customer's inquiry using restaurant policies and menu information: {question}",
+        "expected_output": "An informative response based on the restaurant's official documentation.",
+    },
+}
 
 def create_reservation_agent():
-    return Agent(
-        role="Reservation Manager",
-        goal="Handle restaurant reservations efficiently.",
-        backstory="You are responsible for taking reservations, checking table availability, and managing booking requests.",
-        llm=llm,
-        verbose=True
-    )
+    return Agent(**AGENT_PROFILES["reservation"], llm=get_llm(for_crew=True), verbose=True)
 
 def create_inquiry_agent():
-    return Agent(
-        role="Customer Support",
-        goal="Provide answers about restaurant policies, menu, and general inquiries.",
-        backstory="You are an expert in restaurant policies and menu details, assisting customers with accurate information.",
-        llm=llm,
-        verbose=True
-    )
+    return Agent(**AGENT_PROFILES["inquiry"], llm=get_llm(for_crew=True), verbose=True)
 
 def create_reservation_task(agent, question):
+    task = TASK_PROFILES["reservation"]
     return Task(
-        description=f"Process the reservation request and respond appropriately: {question}",
-        expected_output="A response confirming the reservation status.",
+        description=task["description"].replace("{question}", question),
+        expected_output=task["expected_output"],
         agent=agent
     )
 
 def create_inquiry_task(agent, question):
+    task = TASK_PROFILES["inquiry"]
     return Task(
-        description=f"Answer the customer's inquiry using restaurant policies and menu information: {question}",
-        expected_output="An informative response based on the restaurant's official documentation.",
+        description=task["description"].replace("{question}", question),
+        expected_output=task["expected_output"],
         agent=agent
     )
+
+# ---------- CREW REGISTRY ----------
+def build_crew(role):
+    """Build a single-agent crew whose task takes the question from the kickoff inputs"""
+    if role == "reservation":
+        agent = create_reservation_agent()
+        task = create_reservation_task(agent, "{question}")
+    elif role == "inquiry":
+        agent = create_inquiry_agent()
+        task = create_inquiry_task(agent, "{question}")
+    else:
+        raise ValueError(f"Unknown crew role: {role}")
+    return Crew(agents=[agent], tasks=[task], process=Process.sequential, verbose=True)
+
+_crew_pools = {}
+_crew_pools_lock = threading.Lock()
+
+def get_crew_pool(role):
+    """Return the process-wide crew pool for a role ("reservation" or "inquiry")"""
+    pool = _crew_pools.get(role)
+    if pool is None:
+        with _crew_pools_lock:
+            pool = _crew_pools.get(role)
+            if pool is None:
+                # A crew keeps per-run state while it executes, so each one
+                # runs one kickoff at a time and is reused afterwards
+                pool = _crew_pools[role] = ResourcePool(
+                    lambda: build_crew(role), config.crew_pool_size, timeout=60, name=f"{role} crew"
+                )
+    return pool
+
+@contextmanager
+def checkout_crew(role):
+    """Borrow a prebuilt crew for the duration of a with-block"""
+    pool = get_crew_pool(role)
+    crew = pool.acquire()
+    try:
+        yield crew
+    except BaseException:
+        pool.discard(crew)
+        raise
+    else:
+        pool.release(crew)
+
+def run_crew(role, question):
+    """Answer a question with a pooled crew for the given role"""
+    with checkout_crew(role) as crew:
+        return crew.kickoff(inputs={"question": question})
+
+# ---------- DIRECT CALLS ----------
+# Execution mode per role: "direct" sends one prompt straight to the chat
+# model, "crew" runs the role's CrewAI agent
+LLM_MODES = {
+    "reservation": config.reservation_llm_mode,
+    "inquiry": config.inquiry_llm_mode,
+}
+
+def build_direct_messages(role, question):
+    """One compact prompt: the agent's persona as the system message, the task as the user message"""
+    agent, task = AGENT_PROFILES[role], TASK_PROFILES[role]
+    system = (
+        f"Your role: {agent['role']}. {agent['goal']} {agent['backstory']}\n"
+        f"Reply with {task['expected_output'][0].lower()}{task['expected_output'][1:]} "
+        "Use only the context given; if it does not contain the answer, say so briefly."
+    )
+    return [SystemMessage(content=system), HumanMessage(content=task["description"].replace("{question}", question))]
+
+def run_direct(role, question):
+    """Answer a question with a single chat model call, without CrewAI"""
+    messages = build_direct_messages(role, question)
+    chat_llm = get_llm()
+    return get_llm_dispatcher().run(lambda: chat_llm.ainvoke(messages)).content
+
+def run_agent(role, question):
+    """Answer a question using the execution mode configured for the role.
+
+    Calls go through the LLM dispatcher, which bounds concurrency and time.
+    CrewAI runs synchronously, so a crew is run in a worker thread, which
+    keeps running to completion even if the caller times out.
+    """
+    if LLM_MODES.get(role) == "crew":
+        return get_llm_dispatcher().run(lambda: asyncio.to_thread(run_crew, role, question))
+    return run_direct(role, question)
+
+def stream_agent(role, question):
+    """Yield the answer to a question as text chunks while the model generates it.
+
+    Direct mode streams tokens from the chat model; crew mode, or streaming
+    turned off in config, yields the complete answer as a single chunk.
+    """
+    if not config.stream_responses or LLM_MODES.get(role) == "crew":
+        yield str(run_agent(role, question))
+        return
+    messages = build_direct_messages(role, question)
+    chat_llm = get_llm()
+    for chunk in get_llm_dispatcher().stream(lambda: chat_llm.astream(messages)):
+        if chunk.content:
+            yield chunk.content
@@ -0,0 +1,101 @@
+import time
+import threading
+import numpy as np
+import config
+from embedding_service import get_embedding_service
+
+class SemanticAnswerCache:
+    """Reuse answers to questions that mean the same as one answered recently.
+
+    Questions are embedded with the shared embedding service and compared by
+    cosine similarity against a small in-memory matrix of earlier questions.
+    Entries expire after `ttl` seconds and the whole cache is cleared when
+    the knowledge base is re-ingested.
+    """
+
+    def __init__(self, embeddings, threshold, ttl, max_entries):
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._vectors = None     # one unit-length row per entry
+        self._answers = []
+        self._created = []
+
+    def _embed(self, question):
+        vector = np.asarray(self.embeddings.embed_query(question), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _expire(self):
+        """Drop entries older than the TTL (entries are kept in insertion order)"""
+        cutoff = time.time() - self.ttl
+        expired = 0
+        while expired < len(self._created) and self._created[expired] < cutoff:
+            expired += 1
+        if expired:
+            self._vectors = self._vectors[expired:]
+            del self._answers[:expired]
+            del self._created[:expired]
+
+    def lookup(self, question):
+        """Return a cached answer for a semantically equivalent question, or None"""
+        vector = self._embed(question)
+        with self._lock:
+            self._expire()
+            if self._answers:
+                scores = self._vectors @ vector
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    self.hits += 1
+                    return self._answers[best]
+            self.misses += 1
+            return None
+
+    def store(self, question, answer):
+        """Remember the answer given to a question"""
+        vector = self._embed(question)
+        with self._lock:
+            self._expire()
+            if self._vectors is None or not self._answers:
+                self._vectors = vector[np.newaxis, :]
+            else:
+                self._vectors = np.vstack([self._vectors, vector])
+            self._answers.append(answer)
+            self._created.append(time.time())
+            overflow = len(self._answers) - self.max_entries
+            if overflow > 0:
+                self._vectors = self._vectors[overflow:]
+                del self._answers[:overflow]
+                del self._created[:overflow]
+
+    def clear(self):
+        """Forget every cached answer, e.g. after the knowledge base changed"""
+        with self._lock:
+            self._vectors = None
+            self._answers = []
+            self._created = []
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._answers), "hits": self.hits, "misses": self.misses}
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_answer_cache():
+    """Return the process-wide semantic answer cache"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = SemanticAnswerCache(
+                    get_embedding_service(),
+                    threshold=config.answer_cache_threshold,
+                    ttl=config.answer_cache_ttl,
+                    max_entries=config.answer_cache_size,
+                )
+    return _cache
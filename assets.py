@@ -0,0 +1,130 @@
+import os
+import time
+import hashlib
+import threading
+import urllib.request
+from functools import lru_cache
+from io import BytesIO
+from PIL import Image
+import config
+
+# Remote images the app shows, keyed by the local path they are served from.
+# `python assets.py` downloads any that are missing; the app never waits on them.
+REMOTE_IMAGES = {
+    "restaurant_images/menu/paneer-makhan-wala.jpg":
+        "https://www.ticklingpalates.com/wp-content/uploads/2022/06/paneer-makhani-recipe-500x500.jpg",
+    "restaurant_images/menu/chilgoza-shatavari-matar-ki-tikki.jpg":
+        "https://mytastycurry.com/wp-content/uploads/2020/01/Matar-ki-tikki-1.jpg",
+    "restaurant_images/icons/dining-room.png":
+        "https://img.icons8.com/ios-filled/50/000000/dining-room.png",
+    "restaurant_images/icons/food-and-wine.png":
+        "https://img.icons8.com/ios-filled/50/000000/food-and-wine.png",
+    "restaurant_images/icons/private-events.png":
+        "https://img.icons8.com/?size=100&id=9KPN5HvQHsvg&format=png&color=000000",
+}
+
+_downloads_in_flight = set()
+_retry_after = {}   # path -> time before which a failed download is not retried
+_download_lock = threading.Lock()
+
+def _cache_path(kind, name):
+    directory = os.path.join(config.asset_cache_dir, kind)
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, name)
+
+def download_image(path, attempts=3):
+    """Download the remote image for a local path in REMOTE_IMAGES, retrying with backoff.
+
+    Returns True once the file exists locally.
+    """
+    for attempt in range(attempts):
+        if attempt:
+            time.sleep(2 ** attempt)
+        try:
+            request = urllib.request.Request(REMOTE_IMAGES[path], headers={"User-Agent": "Mozilla/5.0"})
+            with urllib.request.urlopen(request, timeout=config.asset_download_timeout) as response:
+                data = response.read()
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            return True
+        except OSError:
+            continue
+    return False
+
+def fetch_missing_images():
+    """Download every image in REMOTE_IMAGES that is not on disk yet; returns the paths still missing"""
+    return [path for path in REMOTE_IMAGES if not os.path.exists(path) and not download_image(path)]
+
+def _download_in_background(path):
+    try:
+        if not download_image(path):
+            with _download_lock:
+                _retry_after[path] = time.time() + config.asset_retry_seconds
+    finally:
+        with _download_lock:
+            _downloads_in_flight.discard(path)
+
+def schedule_download(path):
+    """Start fetching a missing REMOTE_IMAGES file on a background thread, unless one is
+    already running or the last attempt failed less than ASSET_RETRY_SECONDS ago"""
+    if path not in REMOTE_IMAGES:
+        return
+    with _download_lock:
+        if path in _downloads_in_flight or time.time() < _retry_after.get(path, 0):
+            return
+        _downloads_in_flight.add(path)
+    threading.Thread(target=_download_in_background, args=(path,), daemon=True).start()
+
+def prefetch_missing_images():
+    """Fetch missing REMOTE_IMAGES files in the background"""
+    for path in REMOTE_IMAGES:
+        if not os.path.exists(path):
+            schedule_download(path)
+
+@lru_cache(maxsize=256)
+def _rendition(path, width, mtime):
+    """WebP bytes of an image scaled to `width` pixels, generated once and kept on disk"""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    path_hash = hashlib.sha256(os.path.abspath(path).encode('utf-8')).hexdigest()[:8]
+    rendition_path = _cache_path('thumbs', f"{stem}-{path_hash}-{width}.webp")
+    if os.path.exists(rendition_path) and os.path.getmtime(rendition_path) >= mtime:
+        with open(rendition_path, 'rb') as f:
+            return f.read()
+
+    with Image.open(path) as image:
+        if image.width > width:
+            image = image.resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB')
+        buffer = BytesIO()
+        image.save(buffer, format='WEBP', quality=85)
+
+    data = buffer.getvalue()
+    tmp_path = rendition_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, rendition_path)
+    return data
+
+def get_image(path, width):
+    """Return WebP bytes of a local image at most `width` pixels wide, or None.
+
+    Renditions are cached in memory keyed by (path, width) and on disk under
+    the asset cache, so full-size images are decoded once per size. A missing
+    image that has a remote source is fetched in the background and shows up
+    on a later render; the caller never waits for the download.
+    """
+    if not os.path.exists(path):
+        schedule_download(path)
+        return None
+    try:
+        return _rendition(path, width, os.path.getmtime(path))
+    except OSError:
+        return None
+
+if __name__ == "__main__":
+    missing = fetch_missing_images()
+    print(f"Could not download: {', '.join(missing)}" if missing else "All images are available locally.")
@@ -1,3 +1,76 @@
 import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+def _choice(name, default, choices):
+    """Read a setting that must be one of a few values, ignoring case"""
+    value = os.getenv(name, default).strip().lower()
+    if value not in choices:
+        raise ValueError(f"{name} must be one of {', '.join(choices)}, got {value!r}")
+    return value
 
 groq_api_key = os.getenv('GROQ_API_KEY')
+
+# LLM settings
+llm_provider = _choice('LLM_PROVIDER', 'groq', ('groq', 'fake'))  # "fake" is a local stand-in
+llm_model = os.getenv('LLM_MODEL', 'llama3-8b-8192')
+crew_pool_size = int(os.getenv('CREW_POOL_SIZE', '4'))  # Prebuilt crews per agent role
+# "direct" answers with one chat model call, "crew" runs the CrewAI agent
+reservation_llm_mode = _choice('RESERVATION_LLM_MODE', 'direct', ('direct', 'crew'))
+inquiry_llm_mode = _choice('INQUIRY_LLM_MODE', 'direct', ('direct', 'crew'))
+stream_responses = os.getenv('STREAM_RESPONSES', 'true').lower() == 'true'  # Show chat answers token by token
+llm_max_concurrency = int(os.getenv('LLM_MAX_CONCURRENCY', '16'))  # LLM calls in flight per server process
+llm_timeout = float(os.getenv('LLM_TIMEOUT', '60'))  # Seconds per LLM call, including queueing
+
+# Fake LLM settings (LLM_PROVIDER=fake)
+fake_llm_latency_ms = float(os.getenv('FAKE_LLM_LATENCY_MS', '300'))  # Median time to first token
+fake_llm_latency_sigma = float(os.getenv('FAKE_LLM_LATENCY_SIGMA', '0.5'))  # Log-normal spread of that time
+fake_llm_tokens_per_second = float(os.getenv('FAKE_LLM_TOKENS_PER_SECOND', '50'))
+fake_llm_responses = os.getenv('FAKE_LLM_RESPONSES', '')  # JSON file of {"match", "response"} rules
+fake_llm_seed = int(os.getenv('FAKE_LLM_SEED', '0'))
+if llm_provider == 'fake' and 'crew' in (reservation_llm_mode, inquiry_llm_mode):
+    # CrewAI resolves agent models through LiteLLM, which would call a real provider
+    raise ValueError("LLM_PROVIDER=fake only supports direct mode; set RESERVATION_LLM_MODE and INQUIRY_LLM_MODE to direct")
+
+# Reservations database settings
+db_path = os.getenv('DB_PATH', 'restaurant.db')
+db_pool_size = int(os.getenv('DB_POOL_SIZE', '8'))
+max_capacity = int(os.getenv('MAX_CAPACITY', '50'))  # Seats per time slot
+booking_horizon_days = int(os.getenv('BOOKING_HORIZON_DAYS', '14'))  # Days offered for group bookings
+if booking_horizon_days < 1:
+    raise ValueError(f"BOOKING_HORIZON_DAYS must be at least 1, got {booking_horizon_days}")
+
+# Knowledge base settings
+pdf_directory = os.getenv('PDF_DIRECTORY', 'restaurant_docs')
+vector_store_dir = os.getenv('VECTOR_STORE_DIR', 'vector_store')
+embedding_model = os.getenv('EMBEDDING_MODEL', 'sentence-transformers/all-MiniLM-L6-v2')
+embed_batch_size = int(os.getenv('EMBED_BATCH_SIZE', '32'))
+embed_threads = int(os.getenv('EMBED_THREADS', '0'))  # 0 keeps torch's default
+normalize_embeddings = os.getenv('NORMALIZE_EMBEDDINGS', 'false').lower() == 'true'
+query_cache_size = int(os.getenv('QUERY_CACHE_SIZE', '1024'))
+chunk_size = int(os.getenv('CHUNK_SIZE', '1000'))
+chunk_overlap = int(os.getenv('CHUNK_OVERLAP', '200'))
+extract_workers = int(os.getenv('EXTRACT_WORKERS', '2'))
+extract_parallel_min_pages = int(os.getenv('EXTRACT_PARALLEL_MIN_PAGES', '50'))  # Smaller ingests are extracted in-process
+ingest_batch_size = int(os.getenv('INGEST_BATCH_SIZE', '64'))
+ingest_queue_batches = int(os.getenv('INGEST_QUEUE_BATCHES', '4'))
+
+# Menu catalog settings
+menu_file_pattern = os.getenv('MENU_FILE_PATTERN', 'menu')  # PDFs whose name contains this are parsed into the catalog
+menu_page_size = int(os.getenv('MENU_PAGE_SIZE', '20'))
+menu_match_threshold = float(os.getenv('MENU_MATCH_THRESHOLD', '0.75'))  # Share of a dish name a question must mention
+
+# Embedding cache settings
+embedding_cache_dir = os.getenv('EMBEDDING_CACHE_DIR', 'embedding_cache')
+embedding_cache_size = int(os.getenv('EMBEDDING_CACHE_SIZE', '50000'))
+
+# Semantic answer cache settings
+answer_cache_threshold = float(os.getenv('ANSWER_CACHE_THRESHOLD', '0.92'))
+answer_cache_ttl = int(os.getenv('ANSWER_CACHE_TTL', '3600'))
+answer_cache_size = int(os.getenv('ANSWER_CACHE_SIZE', '500'))
+
+# Image asset settings
+asset_cache_dir = os.getenv('ASSET_CACHE_DIR', 'asset_cache')
+asset_download_timeout = float(os.getenv('ASSET_DOWNLOAD_TIMEOUT', '5'))
+asset_retry_seconds = float(os.getenv('ASSET_RETRY_SECONDS', '300'))  # Wait before retrying a failed background download
@@ -1,78 +1,433 @@
 import sqlite3
 import os
-from datetime import datetime
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+import config
+from pool import ResourcePool
+
+MAX_CAPACITY = config.max_capacity
+TIME_SLOTS = ["5:00 PM", "5:30 PM", "6:00 PM", "6:30 PM", "7:00 PM", "7:30 PM", "8:00 PM", "8:30 PM", "9:00 PM"]
+
+# Applied to every pooled connection. WAL lets readers run alongside the
+# single writer, and busy_timeout makes writers wait instead of failing
+# with "database is locked".
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-16000",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+)
+
+class ConnectionPool(ResourcePool):
+    """Thread-safe pool of configured SQLite connections"""
+
+    def __init__(self, path, size, timeout=10):
+        super().__init__(self._connect, size, timeout, name="database connection")
+        self.path = path
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=self.timeout, check_same_thread=False)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def release(self, conn):
+        """Return a connection to the pool, discarding any uncommitted work"""
+        if conn.in_transaction:
+            conn.rollback()
+        super().release(conn)
+
+    def destroy(self, conn):
+        conn.close()
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """Return the process-wide connection pool for the reservations database"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(config.db_path, config.db_pool_size)
+    return _pool
+
+@contextmanager
+def get_connection():
+    """Borrow a pooled connection for the duration of a with-block"""
+    pool = get_pool()
+    conn = pool.acquire()
+    try:
+        yield conn
+    finally:
+        pool.release(conn)
+
+# ---------- AVAILABILITY CACHE ----------
+# Per-date slot availability, dropped whenever a booking for that date changes.
+# The generation counter stops a read that raced with a write from caching
+# the pre-write totals.
+_availability_cache = {}
+_availability_generation = 0
+_availability_lock = threading.Lock()
+
+def _invalidate_availability(dates):
+    """Forget cached availability for the given dates"""
+    global _availability_generation
+    with _availability_lock:
+        _availability_generation += 1
+        for date in dates:
+            _availability_cache.pop(date, None)
 
 def init_db():
     """Initialize the SQLite database with tables"""
-    conn = sqlite3.connect('restaurant.db')
-    cursor = conn.cursor()
-    
-    # Create reservations table with time slots
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS reservations (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        date TEXT,
-        time TEXT,
-        guests INTEGER,
-        name TEXT,
-        email TEXT,
-        phone TEXT,
-        special_requests TEXT,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )
-    ''')
-    
-    conn.commit()
-    conn.close()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+
+        # Create reservations table with time slots
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS reservations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date TEXT,
+            time TEXT,
+            guests INTEGER,
+            name TEXT,
+            email TEXT,
+            phone TEXT,
+            special_requests TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''')
+
+        # Composite index so per-slot and per-day lookups don't scan the table
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_reservations_date_time ON reservations (date, time)')
+
+        # Per-slot guest totals, kept in step with reservations by triggers so
+        # availability is a primary-key lookup instead of a SUM over bookings
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'slot_occupancy'")
+        occupancy_exists = cursor.fetchone() is not None
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS slot_occupancy (
+            date TEXT NOT NULL,
+            time TEXT NOT NULL,
+            guests_booked INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (date, time)
+        ) WITHOUT ROWID
+        ''')
+        cursor.executescript('''
+        CREATE TRIGGER IF NOT EXISTS trg_reservations_insert AFTER INSERT ON reservations
+        BEGIN
+            INSERT INTO slot_occupancy (date, time, guests_booked) VALUES (NEW.date, NEW.time, NEW.guests)
+            ON CONFLICT (date, time) DO UPDATE SET guests_booked = guests_booked + NEW.guests;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_reservations_delete AFTER DELETE ON reservations
+        BEGIN
+            UPDATE slot_occupancy SET guests_booked = guests_booked - OLD.guests
+            WHERE date = OLD.date AND time = OLD.time;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_reservations_update AFTER UPDATE OF date, time, guests ON reservations
+        BEGIN
+            UPDATE slot_occupancy SET guests_booked = guests_booked - OLD.guests
+            WHERE date = OLD.date AND time = OLD.time;
+            INSERT INTO slot_occupancy (date, time, guests_booked) VALUES (NEW.date, NEW.time, NEW.guests)
+            ON CONFLICT (date, time) DO UPDATE SET guests_booked = guests_booked + NEW.guests;
+        END;
+        ''')
+        if not occupancy_exists:
+            # Backfill totals for bookings made before the table existed
+            cursor.execute('''
+            INSERT INTO slot_occupancy (date, time, guests_booked)
+            SELECT date, time, SUM(guests) FROM reservations GROUP BY date, time
+            ''')
+
+        # Menu catalog parsed from the menu PDFs at ingest time
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS menu_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            source TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            tab TEXT NOT NULL,
+            category TEXT NOT NULL,
+            name TEXT NOT NULL,
+            description TEXT,
+            price INTEGER,
+            price_text TEXT,
+            calories INTEGER,
+            page INTEGER
+        )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_menu_items_tab ON menu_items (tab, source, position)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_menu_items_source ON menu_items (source)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_menu_items_name ON menu_items (name COLLATE NOCASE)')
+
+        conn.commit()
 
 def add_booking(date, time, guests, name='', email='', phone='', special_requests=''):
     """Add a new booking to the database"""
-    conn = sqlite3.connect('restaurant.db')
-    cursor = conn.cursor()
-    
-    cursor.execute(
-        'INSERT INTO reservations (date, time, guests, name, email, phone, special_requests) VALUES (?, ?, ?, ?, ?, ?, ?)',
-        (date, time, guests, name, email, phone, special_requests)
-    )
-    
-    conn.commit()
-    conn.close()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+
+        cursor.execute(
+            'INSERT INTO reservations (date, time, guests, name, email, phone, special_requests) VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (date, time, guests, name, email, phone, special_requests)
+        )
+
+        conn.commit()
+    _invalidate_availability([date])
+    return True
+
+def reserve_many(slots, guests, name='', email='', phone='', special_requests='', all_or_nothing=False):
+    """Book the same party into several (date, time) slots in one transaction.
+
+    All slot totals are read with a single query and the accepted bookings
+    are inserted with executemany. In best-effort mode every slot with room
+    is booked; with all_or_nothing=True nothing is booked unless every slot
+    has room. Returns (booked_slots, rejected_slots), where rejected_slots
+    are the slots without room.
+    """
+    max_capacity = MAX_CAPACITY
+    slots = list(slots)
+    if not slots:
+        return [], []
+
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('BEGIN IMMEDIATE')
+        try:
+            placeholders = ', '.join(['(?, ?)'] * len(slots))
+            cursor.execute(
+                f'SELECT date, time, guests_booked FROM slot_occupancy WHERE (date, time) IN (VALUES {placeholders})',
+                [value for slot in slots for value in slot]
+            )
+            booked_totals = {(date, time): total for date, time, total in cursor.fetchall()}
+
+            booked, rejected = [], []
+            for slot in slots:
+                current_guests = booked_totals.get(slot, 0)
+                if current_guests + guests <= max_capacity:
+                    booked_totals[slot] = current_guests + guests
+                    booked.append(slot)
+                else:
+                    rejected.append(slot)
+
+            if all_or_nothing and rejected:
+                conn.rollback()
+                return [], rejected
+
+            cursor.executemany(
+                'INSERT INTO reservations (date, time, guests, name, email, phone, special_requests) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                [(date, time, guests, name, email, phone, special_requests) for date, time in booked]
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    _invalidate_availability({date for date, _ in booked})
+    return booked, rejected
+
+def cancel_booking(booking_id):
+    """Cancel a booking, returning True if it existed"""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT date FROM reservations WHERE id = ?', (booking_id,))
+        row = cursor.fetchone()
+        if row is None:
+            return False
+        cursor.execute('DELETE FROM reservations WHERE id = ?', (booking_id,))
+        conn.commit()
+
+    _invalidate_availability([row[0]])
     return True
 
 def get_bookings(date=None, time=None):
     """Get all bookings or filter by date and time"""
-    conn = sqlite3.connect('restaurant.db')
-    cursor = conn.cursor()
-    
     query = 'SELECT * FROM reservations'
     params = []
-    
+
     if date and time:
         query += ' WHERE date = ? AND time = ?'
         params = [date, time]
     elif date:
         query += ' WHERE date = ?'
         params = [date]
-    
-    cursor.execute(query, params)
-    bookings = cursor.fetchall()
-    conn.close()
-    
+
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        bookings = cursor.fetchall()
+
     return bookings
 
+def _guests_booked(cursor, date, time):
+    """Return the number of guests already booked for a slot"""
+    cursor.execute('SELECT guests_booked FROM slot_occupancy WHERE date = ? AND time = ?', (date, time))
+    result = cursor.fetchone()
+    return result[0] if result else 0
+
 def check_availability(date, time, party_size):
     """Check if a reservation can be made for given date, time and party size"""
-    max_capacity = 50  # Get from configuration
-    
-    conn = sqlite3.connect('restaurant.db')
-    cursor = conn.cursor()
-    
-    # Get total guests for that time slot
-    cursor.execute('SELECT SUM(guests) FROM reservations WHERE date = ? AND time = ?', (date, time))
-    result = cursor.fetchone()
-    current_guests = result[0] if result[0] else 0
-    
-    conn.close()
-    
+    max_capacity = MAX_CAPACITY
+
+    with get_connection() as conn:
+        current_guests = _guests_booked(conn.cursor(), date, time)
+
     # Check if adding party_size would exceed capacity
     return (current_guests + party_size <= max_capacity, max_capacity - current_guests)
+
+def reserve_if_available(date, time, guests, name='', email='', phone='', special_requests=''):
+    """Check capacity and add a booking in one transaction.
+
+    Returns (booking_id, seats_left). booking_id is None when the party does
+    not fit, in which case seats_left is what the slot still has free.
+    BEGIN IMMEDIATE takes the write lock before the capacity is read, so two
+    sessions can never both claim the last seats.
+    """
+    max_capacity = MAX_CAPACITY
+
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('BEGIN IMMEDIATE')
+        try:
+            current_guests = _guests_booked(cursor, date, time)
+            if current_guests + guests > max_capacity:
+                conn.rollback()
+                return None, max_capacity - current_guests
+
+            cursor.execute(
+                'INSERT INTO reservations (date, time, guests, name, email, phone, special_requests) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (date, time, guests, name, email, phone, special_requests)
+            )
+            booking_id = cursor.lastrowid
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    _invalidate_availability([date])
+    return booking_id, max_capacity - current_guests - guests
+
+def _slot_summary(booked_by_time):
+    """Turn {time: guests_booked} into per-slot booked/remaining seats for every slot"""
+    return {
+        time: {"booked": booked_by_time.get(time, 0), "remaining": MAX_CAPACITY - booked_by_time.get(time, 0)}
+        for time in TIME_SLOTS
+    }
+
+def get_slot_availability_range(start_date, end_date):
+    """Return {date: {time: {"booked", "remaining"}}} for every day from start_date to end_date.
+
+    Dates are 'YYYY-MM-DD' strings. All days are read with one range query on
+    slot_occupancy and each day's result is cached until a booking on it changes.
+    """
+    start = datetime.strptime(start_date, '%Y-%m-%d')
+    end = datetime.strptime(end_date, '%Y-%m-%d')
+    dates = [(start + timedelta(days=i)).strftime('%Y-%m-%d') for i in range((end - start).days + 1)]
+
+    with _availability_lock:
+        if all(date in _availability_cache for date in dates):
+            return {date: _availability_cache[date] for date in dates}
+        generation = _availability_generation
+
+    booked = {date: {} for date in dates}
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            'SELECT date, time, guests_booked FROM slot_occupancy WHERE date BETWEEN ? AND ?',
+            (start_date, end_date)
+        )
+        for date, time, guests_booked in cursor.fetchall():
+            if date in booked:
+                booked[date][time] = guests_booked
+
+    availability = {date: _slot_summary(booked[date]) for date in dates}
+    with _availability_lock:
+        if generation == _availability_generation:
+            _availability_cache.update(availability)
+    return availability
+
+def get_slot_availability(date):
+    """Return {time: {"booked", "remaining"}} for every slot on one date"""
+    return get_slot_availability_range(date, date)[date]
+
+# ---------- MENU CATALOG ----------
+MENU_COLUMNS = ('tab', 'category', 'name', 'description', 'price', 'price_text', 'calories', 'page')
+
+def replace_menu_items(source, items):
+    """Replace every menu item parsed from one source file in a single transaction"""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('BEGIN IMMEDIATE')
+        try:
+            cursor.execute('DELETE FROM menu_items WHERE source = ?', (source,))
+            cursor.executemany(
+                f'INSERT INTO menu_items (source, position, {", ".join(MENU_COLUMNS)}) '
+                f'VALUES (?, ?, {", ".join("?" * len(MENU_COLUMNS))})',
+                [(source, position) + tuple(item.get(column) for column in MENU_COLUMNS)
+                 for position, item in enumerate(items)]
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+def delete_menu_items_except(sources):
+    """Delete menu items parsed from any source file not in `sources`; return how many were deleted"""
+    sources = list(sources)
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            f'DELETE FROM menu_items WHERE source NOT IN ({", ".join("?" * len(sources))})', sources
+        )
+        conn.commit()
+        return cursor.rowcount
+
+def count_menu_items(source=None):
+    """Return the number of menu items, optionally only those from one source file"""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        if source is None:
+            cursor.execute('SELECT COUNT(*) FROM menu_items')
+        else:
+            cursor.execute('SELECT COUNT(*) FROM menu_items WHERE source = ?', (source,))
+        return cursor.fetchone()[0]
+
+def search_menu_items(tab=None, search='', limit=20, offset=0):
+    """Return (items, total) for one page of the menu in menu order.
+
+    `search` matches every word against the name, description and category,
+    case-insensitively. Items are dicts with the menu_items columns.
+    """
+    conditions, params = [], []
+    if tab:
+        conditions.append('tab = ?')
+        params.append(tab)
+    for word in search.split():
+        pattern = f"%{word.replace('%', '').replace('_', '')}%"
+        conditions.append('(name LIKE ? OR description LIKE ? OR category LIKE ?)')
+        params.extend([pattern] * 3)
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ''
+
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
+        cursor.execute(f'SELECT COUNT(*) FROM menu_items{where}', params)
+        total = cursor.fetchone()[0]
+        cursor.execute(
+            f'SELECT id, {", ".join(MENU_COLUMNS)} FROM menu_items{where} ORDER BY source, position LIMIT ? OFFSET ?',
+            params + [limit, offset]
+        )
+        items = [dict(row) for row in cursor.fetchall()]
+    return items, total
+
+def get_menu_items():
+    """Return every menu item in menu order"""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
+        cursor.execute(f'SELECT id, {", ".join(MENU_COLUMNS)} FROM menu_items ORDER BY source, position')
+        return [dict(row) for row in cursor.fetchall()]
@@ -0,0 +1,183 @@
+import os
+import json
+import hashlib
+import threading
+import unicodedata
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+try:
+    import fcntl
+except ImportError:  # Windows: builds are only serialised within one process
+    fcntl = None
+
+INDEX_FILE = "index.json"
+MATRIX_FILE = "embeddings.f32"
+LOCK_FILE = "lock"
+
+_dir_locks = {}
+_dir_locks_lock = threading.Lock()
+
+def _dir_lock(cache_dir):
+    """Return the process-wide lock for one cache directory"""
+    with _dir_locks_lock:
+        return _dir_locks.setdefault(os.path.abspath(cache_dir), threading.Lock())
+
+def normalize_text(text):
+    """Normalize chunk text so trivially different copies share a cache entry"""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+def cache_key(model_name, text):
+    """Content address of a chunk embedding: (model name, normalized text hash)"""
+    return hashlib.sha256(f"{model_name}\0{normalize_text(text)}".encode('utf-8')).hexdigest()
+
+class EmbeddingCache(Embeddings):
+    """Disk-backed, content-addressed cache in front of a document embedding model.
+
+    Vectors live in a fixed-capacity memory-mapped float32 matrix and a small
+    JSON index maps each cache key to its row. When the matrix is full the
+    least recently used rows are evicted and reused once an index without
+    them has been written, so the index on disk never points at a row that
+    holds another chunk's vector.
+
+    Use it as a context manager for the length of a build: entering takes a
+    process-wide lock and a file lock on `cache_dir` and loads the cache,
+    leaving flushes it and releases the locks, so concurrent builds in any
+    process take turns instead of overwriting each other's rows.
+    """
+
+    def __init__(self, embeddings, model_name, cache_dir, max_entries):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._matrix = None
+        self._rows = {}   # key -> [row, last_used_tick]
+        self._tick = 0
+        self._dim = None
+        self._lock_file = None
+
+    def __enter__(self):
+        _dir_lock(self.cache_dir).acquire()
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._lock_file = open(os.path.join(self.cache_dir, LOCK_FILE), 'a')
+            if fcntl:
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            self._load()
+        except BaseException:
+            self._unlock()
+            raise
+        return self
+
+    def __exit__(self, *exc_info):
+        try:
+            self.flush()
+        finally:
+            self._unlock()
+
+    def _unlock(self):
+        if self._lock_file is not None:
+            # Closing the file releases the file lock
+            self._lock_file.close()
+            self._lock_file = None
+        _dir_lock(self.cache_dir).release()
+
+    def _load(self):
+        """Open an existing cache if it matches the current model and capacity"""
+        index_path = os.path.join(self.cache_dir, INDEX_FILE)
+        matrix_path = os.path.join(self.cache_dir, MATRIX_FILE)
+        if not (os.path.exists(index_path) and os.path.exists(matrix_path)):
+            return
+        try:
+            with open(index_path) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return
+        if index.get("model") != self.model_name or index.get("capacity") != self.max_entries:
+            return
+        self._dim = index["dim"]
+        self._rows = index["rows"]
+        self._tick = index["tick"]
+        self._matrix = np.memmap(matrix_path, dtype=np.float32, mode='r+', shape=(self.max_entries, self._dim))
+
+    def _create(self, dim):
+        """Allocate an empty matrix once the embedding dimension is known"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._dim = dim
+        self._rows = {}
+        self._tick = 0
+        self._matrix = np.memmap(os.path.join(self.cache_dir, MATRIX_FILE), dtype=np.float32,
+                                 mode='w+', shape=(self.max_entries, dim))
+
+    def _free_rows(self, count, protected):
+        """Return `count` usable row numbers, evicting least recently used entries if needed"""
+        used = {row for row, _ in self._rows.values()}
+        free = [row for row in range(self.max_entries) if row not in used][:count]
+        if len(free) < count:
+            victims = sorted((tick, key) for key, (_, tick) in self._rows.items() if key not in protected)
+            for _, key in victims[:count - len(free)]:
+                free.append(self._rows.pop(key)[0])
+            # The index on disk may still map the evicted keys to these rows
+            self._write()
+        return free
+
+    def _write(self):
+        """Write the matrix and the key index to disk; the caller holds the lock"""
+        if self._matrix is None:
+            return
+        self._matrix.flush()
+        index = {"model": self.model_name, "capacity": self.max_entries, "dim": self._dim,
+                 "tick": self._tick, "rows": self._rows}
+        tmp_path = os.path.join(self.cache_dir, INDEX_FILE + ".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(index, f)
+        os.replace(tmp_path, os.path.join(self.cache_dir, INDEX_FILE))
+
+    def flush(self):
+        """Write the matrix and the key index to disk.
+
+        New entries are only kept in memory until this is called, so call it
+        once after a build rather than after every batch.
+        """
+        with self._lock:
+            self._write()
+
+    def embed_documents(self, texts):
+        """Embed texts, computing vectors only for chunks not already in the cache"""
+        keys = [cache_key(self.model_name, text) for text in texts]
+        with self._lock:
+            missing = {}
+            for key, text in zip(keys, texts):
+                if key not in self._rows and key not in missing:
+                    missing[key] = text
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+
+            computed = {}
+            if missing:
+                vectors = self.embeddings.embed_documents(list(missing.values()))
+                computed = dict(zip(missing, vectors))
+                if self._matrix is None:
+                    self._create(len(vectors[0]))
+                store_keys = list(computed)[:self.max_entries]
+                for key, row in zip(store_keys, self._free_rows(len(store_keys), set(keys))):
+                    self._matrix[row] = computed[key]
+                    self._rows[key] = [row, 0]
+
+            self._tick += 1
+            results = []
+            for key in keys:
+                if key in self._rows:
+                    self._rows[key][1] = self._tick
+                    results.append(self._matrix[self._rows[key][0]].tolist())
+                else:
+                    results.append(list(computed[key]))
+            return results
+
+    def embed_query(self, text):
+        """Queries are embedded directly; the cache only holds document chunks"""
+        return self.embeddings.embed_query(text)
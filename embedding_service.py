@@ -0,0 +1,130 @@
+import time
+import threading
+from collections import OrderedDict
+from langchain_core.embeddings import Embeddings
+from langchain_community.embeddings import HuggingFaceEmbeddings
+import config
+from embedding_cache import normalize_text
+
+def normalize_query(text):
+    """Normalize a chat question so repeated phrasings share a cache entry"""
+    return normalize_text(text).lower().strip(" ?!.")
+
+class EmbeddingService(Embeddings):
+    """Sentence-transformers embeddings with tuned batching and throughput counters.
+
+    Used for both knowledge base ingestion and query-time retrieval so the
+    batch size, torch thread count and normalization are set in one place.
+    Query embeddings are kept in an LRU cache keyed by the normalized query.
+    """
+
+    def __init__(self, model_name, batch_size=32, num_threads=0, normalize=False, query_cache_size=1024):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.num_threads = num_threads
+        self.normalize = normalize
+        self.texts_embedded = 0
+        self.calls = 0
+        self.seconds = 0.0
+        self._stats_lock = threading.Lock()
+        self._model_lock = threading.Lock()
+        self._model = None
+        self.query_cache_size = query_cache_size
+        self.query_cache_hits = 0
+        self.query_cache_misses = 0
+        self._query_cache = OrderedDict()
+        self._query_cache_lock = threading.Lock()
+
+    @property
+    def cache_name(self):
+        """Identifier for cached vectors; differs whenever the vectors would differ"""
+        return f"{self.model_name}|normalize={self.normalize}"
+
+    @property
+    def model(self):
+        """The underlying model, loaded on first use"""
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    self._model = self._load_model()
+        return self._model
+
+    def _load_model(self):
+        if self.num_threads:
+            import torch
+            torch.set_num_threads(self.num_threads)
+        return HuggingFaceEmbeddings(
+            model_name=self.model_name,
+            model_kwargs={"device": "cpu"},
+            encode_kwargs={"batch_size": self.batch_size, "normalize_embeddings": self.normalize},
+        )
+
+    def _record(self, count, started):
+        with self._stats_lock:
+            self.texts_embedded += count
+            self.calls += 1
+            self.seconds += time.perf_counter() - started
+
+    def embed_documents(self, texts):
+        """Embed a list of texts in batches of `batch_size`"""
+        if not texts:
+            return []
+        started = time.perf_counter()
+        vectors = self.model.embed_documents(list(texts))
+        self._record(len(texts), started)
+        return vectors
+
+    def embed_query(self, text):
+        """Embed a single query string, reusing the vector of an identical earlier query"""
+        key = normalize_query(text)
+        with self._query_cache_lock:
+            vector = self._query_cache.get(key)
+            if vector is not None:
+                self._query_cache.move_to_end(key)
+                self.query_cache_hits += 1
+                return vector
+            self.query_cache_misses += 1
+
+        started = time.perf_counter()
+        vector = self.model.embed_query(key)
+        self._record(1, started)
+
+        with self._query_cache_lock:
+            self._query_cache[key] = vector
+            self._query_cache.move_to_end(key)
+            while len(self._query_cache) > self.query_cache_size:
+                self._query_cache.popitem(last=False)
+        return vector
+
+    def stats(self):
+        """Return throughput counters since the service was created"""
+        with self._stats_lock:
+            return {
+                "texts": self.texts_embedded,
+                "calls": self.calls,
+                "seconds": round(self.seconds, 3),
+                "texts_per_second": round(self.texts_embedded / self.seconds, 1) if self.seconds else 0.0,
+                "query_cache_hits": self.query_cache_hits,
+                "query_cache_misses": self.query_cache_misses,
+            }
+
+_service = None
+_service_lock = threading.Lock()
+
+def get_embedding_service():
+    """Return the process-wide EmbeddingService, shared by every session.
+
+    The model itself is only loaded the first time something is embedded.
+    """
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = EmbeddingService(
+                    config.embedding_model,
+                    batch_size=config.embed_batch_size,
+                    num_threads=config.embed_threads,
+                    normalize=config.normalize_embeddings,
+                    query_cache_size=config.query_cache_size,
+                )
+    return _service
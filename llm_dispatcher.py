@@ -0,0 +1,78 @@
+import asyncio
+import queue
+import threading
+import config
+
+_DONE = object()
+
+class LLMDispatcher:
+    """Runs LLM calls on one background asyncio event loop.
+
+    Chat sessions submit coroutines from their script threads and wait on
+    the result, while the network I/O of every call is multiplexed on a
+    single loop. At most `max_concurrency` calls are in flight; the rest
+    wait their turn. `timeout` bounds each call, including the wait for a
+    free slot, and a call whose caller goes away is cancelled.
+    """
+
+    def __init__(self, max_concurrency, timeout):
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="llm-dispatcher", daemon=True)
+        self._thread.start()
+
+    async def _limited(self, make_coro):
+        async with self._semaphore:
+            return await make_coro()
+
+    def _submit(self, make_coro):
+        return asyncio.run_coroutine_threadsafe(
+            asyncio.wait_for(self._limited(make_coro), self.timeout), self._loop
+        )
+
+    def run(self, make_coro):
+        """Run `make_coro()` on the dispatcher loop and return its result.
+
+        Raises TimeoutError if the call takes longer than the timeout.
+        """
+        future = self._submit(make_coro)
+        try:
+            return future.result()
+        finally:
+            # No-op once finished; cancels the call if the caller was interrupted
+            future.cancel()
+
+    def stream(self, make_stream):
+        """Yield the items of the async iterator `make_stream()` as they arrive.
+
+        Closing the returned generator early, e.g. when a Streamlit rerun
+        abandons it, cancels the underlying call.
+        """
+        items = queue.Queue()
+
+        async def pump():
+            async for item in make_stream():
+                items.put(item)
+
+        future = self._submit(pump)
+        future.add_done_callback(lambda _: items.put(_DONE))
+        try:
+            while (item := items.get()) is not _DONE:
+                yield item
+            future.result()
+        finally:
+            future.cancel()
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+def get_llm_dispatcher():
+    """Return the process-wide LLM dispatcher, starting its event loop on first use"""
+    global _dispatcher
+    if _dispatcher is None:
+        with _dispatcher_lock:
+            if _dispatcher is None:
+                _dispatcher = LLMDispatcher(config.llm_max_concurrency, config.llm_timeout)
+    return _dispatcher
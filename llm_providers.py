@@ -0,0 +1,135 @@
+import re
+import json
+import math
+import time
+import random
+import asyncio
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatResult, ChatGeneration, ChatGenerationChunk
+from pydantic import Field
+import config
+
+class LLMConfigError(ValueError):
+    """The configured LLM provider cannot be used, e.g. Groq without an API key"""
+
+DEFAULT_FAKE_RESPONSE = "Thank you for asking! This is a simulated answer to: {question}"
+
+class FakeChatModel(BaseChatModel):
+    """Deterministic local stand-in for the chat model, for offline tests and load benchmarks.
+
+    The reply is the first canned response whose "match" text appears in the
+    question, or the default template; "{question}" in a response is filled
+    in. Time to first token is log-normally distributed around
+    `latency_ms`, after which tokens arrive at `tokens_per_second`. Both the
+    text and the timings depend only on the seed and the prompt, so a run
+    can be repeated exactly.
+    """
+
+    latency_ms: float = 300.0
+    latency_sigma: float = 0.5
+    tokens_per_second: float = 50.0
+    responses: list = Field(default_factory=list)
+    default_response: str = DEFAULT_FAKE_RESPONSE
+    seed: int = 0
+
+    @property
+    def _llm_type(self):
+        return "fake-chat"
+
+    def _reply(self, messages):
+        """Return (seconds to first token, seconds per token, tokens) for a prompt"""
+        prompt = "\n".join(str(message.content) for message in messages)
+        # The retrieval path puts the customer's words after "Question:"
+        question = prompt.rsplit("Question:", 1)[-1].strip()
+        template = next(
+            (rule["response"] for rule in self.responses if rule["match"].lower() in question.lower()),
+            self.default_response,
+        )
+        tokens = re.findall(r"\S+\s*", template.replace("{question}", question))
+        rng = random.Random(f"{self.seed}\0{prompt}")
+        first_token = rng.lognormvariate(math.log(self.latency_ms / 1000), self.latency_sigma) if self.latency_ms else 0.0
+        per_token = 1 / self.tokens_per_second if self.tokens_per_second else 0.0
+        return first_token, per_token, tokens
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        first_token, per_token, tokens = self._reply(messages)
+        time.sleep(first_token + per_token * len(tokens))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(tokens)))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        first_token, per_token, tokens = self._reply(messages)
+        await asyncio.sleep(first_token + per_token * len(tokens))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(tokens)))])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        first_token, per_token, tokens = self._reply(messages)
+        time.sleep(first_token)
+        for i, token in enumerate(tokens):
+            if i:
+                time.sleep(per_token)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        first_token, per_token, tokens = self._reply(messages)
+        await asyncio.sleep(first_token)
+        for i, token in enumerate(tokens):
+            if i:
+                await asyncio.sleep(per_token)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+def load_fake_responses(path):
+    """Read canned responses, a JSON list of {"match": ..., "response": ...}.
+
+    Raises LLMConfigError naming the file if it cannot be read or a rule is malformed.
+    """
+    if not path:
+        return []
+    try:
+        with open(path) as f:
+            rules = json.load(f)
+    except (OSError, ValueError) as e:
+        raise LLMConfigError(f"FAKE_LLM_RESPONSES file {path} could not be read: {e}") from e
+    if not isinstance(rules, list):
+        raise LLMConfigError(f"FAKE_LLM_RESPONSES file {path} must contain a JSON list of rules")
+    for i, rule in enumerate(rules):
+        if not (isinstance(rule, dict) and isinstance(rule.get("match"), str) and isinstance(rule.get("response"), str)):
+            raise LLMConfigError(
+                f'FAKE_LLM_RESPONSES file {path}: rule {i} needs string "match" and "response" fields'
+            )
+    return rules
+
+def create_chat_model(for_crew=False):
+    """Build the chat model for the configured LLM provider ("groq" or "fake").
+
+    With for_crew=True the model is the one handed to CrewAI agents. Raises
+    LLMConfigError if the model cannot be used with the current settings.
+    """
+    if config.llm_provider == "fake":
+        if for_crew:
+            raise LLMConfigError("LLM_PROVIDER=fake only supports direct mode")
+        return FakeChatModel(
+            latency_ms=config.fake_llm_latency_ms,
+            latency_sigma=config.fake_llm_latency_sigma,
+            tokens_per_second=config.fake_llm_tokens_per_second,
+            responses=load_fake_responses(config.fake_llm_responses),
+            seed=config.fake_llm_seed,
+        )
+    if not config.groq_api_key:
+        raise LLMConfigError("GROQ_API_KEY not found. Please set it in your .env file or environment variables.")
+
+    from langchain_groq import ChatGroq
+    if for_crew:
+        # CrewAI routes models through LiteLLM, which needs the provider prefix
+        return ChatGroq(model=f"groq/{config.llm_model}", api_key=config.groq_api_key)
+
+    import httpx
+    # The async HTTP client is only used from the LLM dispatcher's event loop,
+    # so every call shares one pool of keep-alive connections
+    return ChatGroq(
+        model=config.llm_model,
+        api_key=config.groq_api_key,
+        http_async_client=httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=config.llm_max_concurrency, keepalive_expiry=60)
+        )
+    )
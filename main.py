@@ -1,24 +1,41 @@
-import os
 import re
 from datetime import datetime, timedelta
 import streamlit as st
 from dotenv import load_dotenv
-from database import init_db, add_booking, get_bookings, check_availability
-from agents import create_reservation_agent, create_inquiry_agent, create_reservation_task, create_inquiry_task
-from utils import load_environment, get_max_capacity, initialize_knowledge_base
-from langchain_groq import ChatGroq
-from crewai import Agent, Task, Crew, Process
+from database import init_db, reserve_if_available, reserve_many, get_slot_availability, get_slot_availability_range, TIME_SLOTS
+import config
+from agents import stream_agent
+from llm_providers import LLMConfigError
+from embedding_service import get_embedding_service
+from answer_cache import get_answer_cache
+from assets import get_image, prefetch_missing_images
+from utils import load_environment, get_max_capacity, initialize_knowledge_base, load_knowledge_base, knowledge_base_is_stale, get_menu_page
+from menu_catalog import MENU_TABS, format_price
+from menu_answers import answer_menu_question
 
 # ---------- CONFIGURATION AND SETUP ----------
+GROUP_TIME_SLOTS = ["5:00 PM", "6:00 PM", "7:00 PM", "8:00 PM"]
+
+# Photos for menu items, keyed by lower-case dish name
+MENU_IMAGES = {
+    "paneer makhan wala": "restaurant_images/menu/paneer-makhan-wala.jpg",
+    "chilgoza shatavari matar ki tikki": "restaurant_images/menu/chilgoza-shatavari-matar-ki-tikki.jpg",
+}
+
 def initialize_app():
     """Initialize the application state and configuration"""
     # Initialize session state variables
     if 'messages' not in st.session_state:
         st.session_state.messages = []
 
-    if 'vector_ready' not in st.session_state:
-        st.session_state.vector_ready = False
+    # Attach to the shared, persisted knowledge base (loaded once per process)
+    st.session_state.vector_ready = load_knowledge_base() is not None
+
+    setup_resources()
 
+@st.cache_resource
+def setup_resources():
+    """One-time process setup shared by every session and rerun"""
     # Load environment variables
     load_dotenv('.env')
     load_environment()
@@ -26,39 +43,37 @@ def initialize_app():
     # Initialize database
     init_db()
 
-    # Configure LangChain LLM
-    groq_api_key = os.getenv('GROQ_API_KEY')
-    return ChatGroq(model="groq/llama3-8b-8192", api_key=groq_api_key)
+    # Fetch any page images missing from restaurant_images/ without blocking page loads
+    prefetch_missing_images()
+    # The chat model is created on first use by agents.get_llm (see LLM_PROVIDER)
+
+def show_image(path, width=None, rendition_width=None, target=st):
+    """Display a local image from the asset cache, skipping it if unavailable"""
+    # Render at twice the display width so images stay sharp on high-DPI screens
+    data = get_image(path, rendition_width or width * 2)
+    if data is None:
+        return
+    if width:
+        target.image(data, width=width)
+    else:
+        target.image(data, use_container_width=True)
 
 # ---------- HELPER FUNCTIONS ----------
-def process_mass_booking(selected_dates, time_slot, number_of_people, group_name, contact_person, contact_email, event_type, special_requirements):
+def process_mass_booking(selected_dates, time_slot, number_of_people, group_name, contact_person, contact_email, event_type, special_requirements, all_or_nothing=False):
     """Process multiple bookings for group events"""
-    successful_dates = []
-    failed_dates = []
-    
     try:
-        for date in selected_dates:
-            # Check availability first
-            is_available, _ = check_availability(date, time_slot, number_of_people)
-            
-            if is_available:
-                # Add booking to database
-                add_booking(
-                    date=date,
-                    time=time_slot,
-                    guests=number_of_people,
-                    name=group_name,
-                    email=contact_email,
-                    special_requests=f"Event Type: {event_type}. {special_requirements}"
-                )
-                successful_dates.append(date)
-            else:
-                failed_dates.append(date)
-                
-        return successful_dates, failed_dates
+        booked, rejected = reserve_many(
+            [(date, time_slot) for date in selected_dates],
+            guests=number_of_people,
+            name=group_name,
+            email=contact_email,
+            special_requests=f"Event Type: {event_type}. {special_requirements}",
+            all_or_nothing=all_or_nothing
+        )
+        return [date for date, _ in booked], [date for date, _ in rejected]
     except Exception as e:
         st.error(f"Error processing bookings: {str(e)}")
-        return successful_dates, failed_dates
+        return [], list(selected_dates)
 
 def add_message(role: str, content: str):
     """Add a message to the chat history"""
@@ -66,53 +81,88 @@ def add_message(role: str, content: str):
     with st.chat_message(role):
         st.markdown(content)
 
+def add_streamed_message(role: str, chunks):
+    """Show a message in the chat as its text chunks arrive, then add the full text to the history"""
+    with st.chat_message(role):
+        content = st.write_stream(chunks)
+    st.session_state.messages.append({"role": role, "content": content})
+    return content
+
 def process_reservation(prompt: str, enhanced_question: str):
     """Process a reservation request from the chatbot"""
-    # Extract booking details
+    # Extract booking details, removing the date and time from the text as
+    # they are found so their digits are not read as the party size
+    slot_list = f"{TIME_SLOTS[0]} to {TIME_SLOTS[-1]} in 30-minute slots ({', '.join(TIME_SLOTS)})"
     date_match = re.search(r'\b(\d{4}-\d{2}-\d{2})\b', prompt)
     booking_date = date_match.group(1) if date_match else (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
-    num_match = re.search(r'\b(\d+)\b', prompt)
-    number_of_people = int(num_match.group(1)) if num_match else 2
-    
-    # Try to extract time, otherwise use default
-    time_match = re.search(r'(\d{1,2}):?(\d{2})?\s*(am|pm|AM|PM)', prompt)
-    booking_time = time_match.group(0) if time_match else "7:00 PM"  # Default time
-    
-    # Standardize time format
-    if ":" not in booking_time:
-        booking_time = booking_time.replace(" ", ":00 ")
+    rest = prompt[:date_match.start()] + " " + prompt[date_match.end():] if date_match else prompt
 
-    # Capacity check
-    MAX_CAPACITY = get_max_capacity()
-    existing_bookings = get_bookings()
-    total_guests = sum(b[2] for b in existing_bookings if b[1] == booking_date)
-
-    if total_guests + number_of_people > MAX_CAPACITY:
-        return f"Sorry, we are fully booked for {booking_date} (Max capacity: {MAX_CAPACITY} guests). Please choose another date or reduce the party size.", None
+    # Try to extract time, otherwise use default
+    time_match = re.search(r'\b(\d{1,2}):?(\d{2})?\s*(am|pm)\b', rest, re.IGNORECASE)
+    booking_time = "7:00 PM"  # Default time
+    if time_match:
+        # Standardize time format to match the reservation form slots (e.g. "7:00 PM")
+        hour, minute, meridiem = time_match.groups()
+        booking_time = f"{int(hour)}:{minute or '00'} {meridiem.upper()}"
+        rest = rest[:time_match.start()] + " " + rest[time_match.end():]
+    elif re.search(r'\b\d{1,2}:\d{2}\b|\bat\s+\d{1,2}\b', rest, re.IGNORECASE):
+        # A time without am/pm, e.g. "at 8:00" or "at 8", is not guessed at
+        return f"Which time would you like? We take reservations for {slot_list}.", None
+
+    # Only the form's time slots have a capacity; any other time would be
+    # booked outside the per-slot limit and the availability views
+    if booking_time not in TIME_SLOTS:
+        return f"Sorry, we take reservations for {slot_list}. Please ask for one of these times.", None
+
+    num_match = re.search(r'\b(\d+)\b', rest)
+    number_of_people = int(num_match.group(1)) if num_match else 2
+    if not 1 <= number_of_people <= get_max_capacity():
+        return f"Sorry, we can seat parties of 1 to {get_max_capacity()} people. How many guests should we expect?", None
 
-    # Fix: Include all required parameters for add_booking
-    add_booking(
+    # Capacity check and booking in one transaction, same as the reservation form
+    booking_id, seats_left = reserve_if_available(
         date=booking_date,
         time=booking_time,
         guests=number_of_people,
-        name="Chat Reservation", 
+        name="Chat Reservation",
         email="",
         phone="",
         special_requests="Booked via chatbot"
     )
-    
+
+    if booking_id is None:
+        return f"Sorry, we are fully booked for {booking_date} at {booking_time} ({max(seats_left, 0)} of {get_max_capacity()} seats left). Please choose another time or reduce the party size.", None
+
     confirmation = f"Reservation recorded for {number_of_people} people on {booking_date} at {booking_time}."
-    reservation_agent = create_reservation_agent()
-    task = create_reservation_task(reservation_agent, enhanced_question)
-    crew = Crew(agents=[reservation_agent], tasks=[task], process=Process.sequential, verbose=True)
-    return confirmation, crew.kickoff(inputs={"question": enhanced_question})
+    return confirmation, stream_agent("reservation", enhanced_question)
 
 def process_inquiry(enhanced_question: str):
-    """Process a general inquiry from the chatbot"""
-    inquiry_agent = create_inquiry_agent()
-    task = create_inquiry_task(inquiry_agent, enhanced_question)
-    crew = Crew(agents=[inquiry_agent], tasks=[task], process=Process.sequential, verbose=True)
-    return crew.kickoff(inputs={"question": enhanced_question})
+    """Process a general inquiry from the chatbot, yielding the answer as it is generated"""
+    return stream_agent("inquiry", enhanced_question)
+
+def retrieve_context(prompt: str):
+    """Build the question for the agents, prefixed with matching knowledge base passages"""
+    similar_docs = load_knowledge_base().similarity_search(prompt, k=3)
+    retrieved_context = "\n".join(
+        [doc.page_content if hasattr(doc, "page_content") else str(doc) for doc in similar_docs]
+    )
+    return f"Context:\n{retrieved_context}\n\nQuestion:\n{prompt}"
+
+def answer_inquiry(prompt: str):
+    """Yield the answer to a general inquiry, reusing the answer to an equivalent recent question"""
+    answer_cache = get_answer_cache()
+    response = answer_cache.lookup(prompt)
+    if response is not None:
+        yield response
+        return
+    chunks = []
+    for chunk in process_inquiry(retrieve_context(prompt)):
+        chunks.append(chunk)
+        yield chunk
+    # Only complete, non-empty answers are cached; an interrupted stream never gets here
+    response = "".join(chunks)
+    if response.strip():
+        answer_cache.store(prompt, response)
 
 # ---------- UI COMPONENTS ----------
 def load_css():
@@ -238,7 +288,7 @@ def load_css():
 
 def setup_sidebar():
     """Set up the sidebar navigation and options"""
-    st.sidebar.image("1.png", use_container_width=True)
+    show_image("restaurant_images/1.png", rendition_width=600, target=st.sidebar)
     st.sidebar.title("🍽️ Indian Palace")
     st.sidebar.markdown("---")
 
@@ -249,8 +299,16 @@ def setup_sidebar():
 
     # Knowledge Base Initialization
     with st.sidebar.expander("📚 Admin Options"):
+        if st.session_state.vector_ready and knowledge_base_is_stale():
+            st.caption("Restaurant documents have changed since the knowledge base was built.")
         if st.button("Initialize Knowledge Base"):
             initialize_knowledge_base()
+        if st.button("Rebuild from Scratch"):
+            initialize_knowledge_base(incremental=False)
+        embedding_stats = get_embedding_service().stats()
+        if embedding_stats["texts"]:
+            st.caption(f"Embeddings: {embedding_stats['texts']} texts, {embedding_stats['texts_per_second']} texts/s, "
+                       f"query cache {embedding_stats['query_cache_hits']} hits / {embedding_stats['query_cache_misses']} misses")
 
     # Sidebar Footer
     st.sidebar.markdown("---")
@@ -263,7 +321,7 @@ def render_home_page():
     """Render the Home page content"""
     # Hero Section
     st.markdown('<div class="restaurant-header">', unsafe_allow_html=True)
-    st.image("2.jpg", use_container_width=True)
+    show_image("restaurant_images/2.jpg", rendition_width=1400)
     st.title("🍽️ Welcome to Indian Palace")
     st.markdown("**Experience authentic Indian cuisine in the heart of the city**")
     st.markdown('</div>', unsafe_allow_html=True)
@@ -290,7 +348,7 @@ def render_home_page():
     # Feature 1: Elegant Dining
     with col1:
         st.markdown('<div class="info-card">', unsafe_allow_html=True)
-        st.image("https://img.icons8.com/ios-filled/50/000000/dining-room.png", width=50)
+        show_image("restaurant_images/icons/dining-room.png", width=50)
         st.markdown("#### Elegant Dining")
         st.write("Our restaurant offers a warm, elegant atmosphere perfect for any occasion.")
         st.markdown('</div>', unsafe_allow_html=True)
@@ -298,7 +356,7 @@ def render_home_page():
     # Feature 2: Authentic Cuisine    
     with col2:
         st.markdown('<div class="info-card">', unsafe_allow_html=True)
-        st.image("https://img.icons8.com/ios-filled/50/000000/food-and-wine.png", width=50)
+        show_image("restaurant_images/icons/food-and-wine.png", width=50)
         st.markdown("#### Authentic Cuisine")
         st.write("Experience the true flavors of India with our authentic recipes.")
         st.markdown('</div>', unsafe_allow_html=True)
@@ -306,7 +364,7 @@ def render_home_page():
     # Feature 3: Private Events
     with col3:
         st.markdown('<div class="info-card">', unsafe_allow_html=True)
-        st.image("https://img.icons8.com/?size=100&id=9KPN5HvQHsvg&format=png&color=000000", width=50)
+        show_image("restaurant_images/icons/private-events.png", width=50)
         st.markdown("#### Private Events")
         st.write("Host your special events with us for an unforgettable experience.")
         st.markdown('</div>', unsafe_allow_html=True)
@@ -314,32 +372,63 @@ def render_home_page():
 def render_menu_page():
     """Render the Menu page content"""
     st.title("Our Menu")
-    
+
+    search = st.text_input("Search the menu", placeholder="e.g. paneer, prawns, soup", key="menu_search")
+
     # Menu Tabs
-    menu_tab1, menu_tab2, menu_tab3, menu_tab4 = st.tabs(["Appetizers", "Main Course", "Desserts", "Beverages"])
-    
-    # Appetizers Tab
-    with menu_tab1:
-        render_menu_item(
-            image_url="https://www.ticklingpalates.com/wp-content/uploads/2022/06/paneer-makhani-recipe-500x500.jpg",
-            name="Paneer makhan wala",
-            description="Cottage cheese simmered in tomato gravy, Topped with cream",
-            price="₹1200"
-        )
-        
+    for tab, container in zip(MENU_TABS, st.tabs(MENU_TABS)):
+        with container:
+            render_menu_tab(tab, search)
+
+def render_menu_tab(tab, search):
+    """Render one page of a menu tab from the catalog"""
+    page_key = f"menu_page_{tab}"
+    # Start from the first page whenever the search changes
+    if st.session_state.get(f"{page_key}_search") != search:
+        st.session_state[page_key] = 0
+        st.session_state[f"{page_key}_search"] = search
+    page = st.session_state.get(page_key, 0)
+
+    items, total = get_menu_page(tab, search, page)
+    if total and not items:
+        # The catalog shrank since this page was opened
+        page = st.session_state[page_key] = 0
+        items, total = get_menu_page(tab, search, page)
+    if not total:
+        if search:
+            st.info("No dishes match your search.")
+        elif get_menu_page(None)[1]:
+            st.info(f"No {tab.lower()} on the menu at the moment.")
+        else:
+            st.info("The menu will appear here once the knowledge base has been initialized.")
+        return
+
+    for item in items:
         render_menu_item(
-            image_url="https://mytastycurry.com/wp-content/uploads/2020/01/Matar-ki-tikki-1.jpg",
-            name="Chilgoza shatavari matar ki tikki",
-            description="Green peas, Asparagus and Roasted pine nuts",
-            price="₹1100"
+            image_url=MENU_IMAGES.get(item["name"].lower()),
+            name=item["name"],
+            description=item["description"],
+            price=format_price(item["price_text"])
         )
 
+    page_count = -(-total // config.menu_page_size)
+    if page_count > 1:
+        col1, col2, col3 = st.columns([1, 2, 1])
+        if col1.button("← Previous", key=f"{page_key}_prev", disabled=page == 0):
+            st.session_state[page_key] = page - 1
+            st.rerun()
+        col2.caption(f"Page {page + 1} of {page_count} · {total} dishes")
+        if col3.button("Next →", key=f"{page_key}_next", disabled=page >= page_count - 1):
+            st.session_state[page_key] = page + 1
+            st.rerun()
+
 def render_menu_item(image_url, name, description, price):
     """Helper function to render a menu item card"""
     st.markdown('<div class="menu-card">', unsafe_allow_html=True)
     col1, col2 = st.columns([1, 3])
     with col1:
-        st.image(image_url, width=100)
+        if image_url:
+            show_image(image_url, width=100)
     with col2:
         st.markdown(f"### {name}")
         st.write(description)
@@ -377,7 +466,7 @@ def render_new_reservation_form():
         
         with col2:
             date = st.date_input("Reservation Date")
-            time = st.selectbox("Time", ["5:00 PM", "5:30 PM", "6:00 PM", "6:30 PM", "7:00 PM", "7:30 PM", "8:00 PM", "8:30 PM", "9:00 PM"])
+            time = st.selectbox("Time", TIME_SLOTS)
             guests = st.number_input("Number of Guests", min_value=1, max_value=20, value=2)
         
         special_requests = st.text_area("Special Requests (Optional)")
@@ -390,21 +479,19 @@ def process_reservation_submission(submit_button, name, email, phone, date, time
     """Process the reservation form submission"""
     if submit_button:
         if name and email and phone:
-            # Check availability first
             date_str = date.strftime('%Y-%m-%d')
-            is_available, seats_left = check_availability(date_str, time, guests)
-            
-            if is_available:
-                # Add booking with all details
-                add_booking(
-                    date=date_str,
-                    time=time,
-                    guests=guests,
-                    name=name,
-                    email=email,
-                    phone=phone,
-                    special_requests=special_requests
-                )
+            # Check availability and book in one transaction
+            booking_id, seats_left = reserve_if_available(
+                date=date_str,
+                time=time,
+                guests=guests,
+                name=name,
+                email=email,
+                phone=phone,
+                special_requests=special_requests
+            )
+
+            if booking_id is not None:
                 st.success(f"Reservation confirmed for {name} on {date_str} at {time} for {guests} guests.")
             else:
                 st.error(f"Sorry, we don't have enough space for {guests} guests at {time}. We have {seats_left} seats left at that time.")
@@ -417,12 +504,12 @@ def render_availability_checker():
     st.subheader("Check Table Availability")
     check_date = st.date_input("Select Date", key="check_date")
     
-    # Get bookings for the selected date
+    # Get per-slot totals for the selected date
     date_str = check_date.strftime('%Y-%m-%d')
-    existing_bookings = get_bookings(date=date_str)
+    slot_availability = get_slot_availability(date_str)
     
     # Calculate total guests for the day
-    total_guests = sum(booking[3] for booking in existing_bookings) if existing_bookings else 0
+    total_guests = sum(slot["booked"] for slot in slot_availability.values())
     max_capacity = get_max_capacity()
     
     # Display availability stats
@@ -433,36 +520,53 @@ def render_availability_checker():
         st.metric("Total Capacity", max_capacity)
         
     # Show availability by time slot
-    display_time_slot_availability(existing_bookings, max_capacity)
+    display_time_slot_availability(slot_availability)
     st.markdown('</div>', unsafe_allow_html=True)
 
-def display_time_slot_availability(existing_bookings, max_capacity):
+def availability_status(seats_left):
+    """Return the status label and colour for the seats left in a slot"""
+    if seats_left >= 10:
+        return "Available", "green"
+    elif seats_left > 0:
+        return f"Limited ({seats_left} seats)", "orange"
+    else:
+        return "Fully Booked", "red"
+
+def display_time_slot_availability(slot_availability):
     """Display availability for each time slot"""
     st.subheader("Availability by Time")
-    times = ["5:00 PM", "5:30 PM", "6:00 PM", "6:30 PM", "7:00 PM", "7:30 PM", "8:00 PM", "8:30 PM", "9:00 PM"]
     
-    for time_slot in times:
-        # Get bookings for this specific time slot
-        time_bookings = [b for b in existing_bookings if b[2] == time_slot]
-        time_guests = sum(b[3] for b in time_bookings) if time_bookings else 0
-        seats_left = max_capacity - time_guests
-        
+    for time_slot, slot in slot_availability.items():
         # Determine availability status
-        if seats_left >= 10:
-            status = "Available"
-            color = "green"
-        elif seats_left > 0:
-            status = f"Limited ({seats_left} seats)"
-            color = "orange"
-        else:
-            status = "Fully Booked"
-            color = "red"
+        status, color = availability_status(slot["remaining"])
         
         st.markdown(f"<div style='display: flex; justify-content: space-between;'>"
                   f"<span>{time_slot}</span>"
                   f"<span style='color: {color};'>{status}</span>"
                   f"</div>", unsafe_allow_html=True)
 
+def render_availability_heatmap(dates, time_slots):
+    """Render remaining seats per date and time slot as a colour-coded grid"""
+    if not dates:
+        return
+    availability = get_slot_availability_range(dates[0], dates[-1])
+    header = "".join(f"<th style='padding: 4px 8px;'>{time_slot}</th>" for time_slot in time_slots)
+    rows = []
+    for date in dates:
+        cells = []
+        for time_slot in time_slots:
+            seats_left = availability[date][time_slot]["remaining"]
+            _, color = availability_status(seats_left)
+            cells.append(f"<td style='padding: 4px 8px; text-align: center; color: white; background-color: {color};'>"
+                         f"{max(seats_left, 0)}</td>")
+        rows.append(f"<tr><td style='padding: 4px 8px;'>{date}</td>{''.join(cells)}</tr>")
+
+    st.caption("Seats left per date and time")
+    st.markdown(f"<div style='max-height: 300px; overflow-y: auto; margin-bottom: 1rem;'>"
+                f"<table style='border-collapse: collapse; width: 100%;'>"
+                f"<tr><th style='padding: 4px 8px;'>Date</th>{header}</tr>{''.join(rows)}"
+                f"</table></div>", unsafe_allow_html=True)
+
 def render_group_booking_form():
     """Render the group booking form"""
     st.markdown('<div class="reservation-card">', unsafe_allow_html=True)
@@ -482,26 +586,29 @@ def render_group_booking_form():
                                     ["Corporate Meeting", "Birthday Party", "Wedding Reception", 
                                     "Anniversary", "Other"])
             time_slot = st.selectbox("Preferred Time", 
-                                    ["5:00 PM", "6:00 PM", "7:00 PM", "8:00 PM"], 
+                                    GROUP_TIME_SLOTS, 
                                     key="group_time")
         
         # Calendar selector
         st.subheader("Select Dates")
-        available_dates = [(datetime.now() + timedelta(days=i)).strftime('%Y-%m-%d') for i in range(1, 15)]
+        available_dates = [(datetime.now() + timedelta(days=i)).strftime('%Y-%m-%d')
+                           for i in range(1, config.booking_horizon_days + 1)]
+        render_availability_heatmap(available_dates, GROUP_TIME_SLOTS)
         selected_dates = st.multiselect("Select all dates needed:", available_dates)
         
         # Special requirements
         special_requirements = st.text_area("Special Requirements or Notes",
                                         placeholder="Please let us know about any dietary restrictions, room setup preferences, or other special needs.")
+        all_or_nothing = st.checkbox("Only book if every selected date is available")
         
         submit_group = st.form_submit_button("📅 Request Group Booking")
         
         process_group_booking_submission(submit_group, selected_dates, group_name, contact_person, contact_email,
-                                         time_slot, number_of_people, event_type, special_requirements)
+                                         time_slot, number_of_people, event_type, special_requirements, all_or_nothing)
     st.markdown('</div>', unsafe_allow_html=True)
 
 def process_group_booking_submission(submit_group, selected_dates, group_name, contact_person, contact_email,
-                                    time_slot, number_of_people, event_type, special_requirements):
+                                    time_slot, number_of_people, event_type, special_requirements, all_or_nothing=False):
     """Process the group booking form submission"""
     if submit_group and selected_dates and group_name and contact_person and contact_email:
         successful_dates, failed_dates = process_mass_booking(
@@ -512,13 +619,16 @@ def process_group_booking_submission(submit_group, selected_dates, group_name, c
             contact_person, 
             contact_email,
             event_type,
-            special_requirements
+            special_requirements,
+            all_or_nothing
         )
         
         if successful_dates:
             st.success(f"Successfully booked: {', '.join(successful_dates)}")
         
-        if failed_dates:
+        if failed_dates and all_or_nothing:
+            st.error(f"Nothing was booked because these dates have no availability: {', '.join(failed_dates)}")
+        elif failed_dates:
             st.error(f"No availability for these dates: {', '.join(failed_dates)}")
     elif submit_group:
         st.warning("Please fill out all required fields and select at least one date.")
@@ -563,8 +673,13 @@ def render_contact_page():
                 st.success("Message sent! We'll get back to you soon.")
         st.markdown('</div>', unsafe_allow_html=True)
 
+@st.fragment
 def render_chatbot():
-    """Render the chatbot section"""
+    """Render the chatbot section.
+
+    Runs as a fragment, so sending a chat message reruns only this function
+    rather than the whole page.
+    """
     st.markdown("---")
     st.subheader("💬 Ask Our Virtual Assistant")
 
@@ -575,32 +690,35 @@ def render_chatbot():
 
     if prompt := st.chat_input("How can I assist you today?"):
         add_message("user", prompt)
-        
-        if not st.session_state.get("vector_ready", False):
+        is_reservation = "reservation" in prompt.lower() or "book a table" in prompt.lower()
+
+        # Price, calorie and "do you have ..." questions about one dish are
+        # answered straight from the menu catalog without an LLM call
+        menu_answer = None if is_reservation else answer_menu_question(prompt)
+        if menu_answer:
+            add_message("assistant", menu_answer)
+        elif not st.session_state.get("vector_ready", False):
             response = "⚠️ Please initialize the knowledge base first using the sidebar button."
             add_message("assistant", response)
         else:
-            # Get context from vector database
-            similar_docs = st.session_state.vectors.similarity_search(prompt, k=3)
-            retrieved_context = "\n".join(
-                [doc.page_content if hasattr(doc, "page_content") else str(doc) for doc in similar_docs]
-            )
-            enhanced_question = f"Context:\n{retrieved_context}\n\nQuestion:\n{prompt}"
-            
             # Process based on query type
-            if "reservation" in prompt.lower() or "book a table" in prompt.lower():
-                response_msg, llm_response = process_reservation(prompt, enhanced_question)
-                add_message("assistant", response_msg)
-                if llm_response:
-                    add_message("assistant", llm_response)
-            else:
-                response = process_inquiry(enhanced_question)
-                add_message("assistant", response)
+            try:
+                if is_reservation:
+                    response_msg, llm_response = process_reservation(prompt, retrieve_context(prompt))
+                    add_message("assistant", response_msg)
+                    if llm_response:
+                        add_streamed_message("assistant", llm_response)
+                else:
+                    add_streamed_message("assistant", answer_inquiry(prompt))
+            except TimeoutError:
+                add_message("assistant", "⚠️ Our assistant is very busy right now. Please try again in a moment.")
+            except LLMConfigError as e:
+                add_message("assistant", f"⚠️ The assistant is not configured correctly: {e}")
 
 # ---------- MAIN APP ----------
 def main():
     """Main application entry point"""
-    llm = initialize_app()
+    initialize_app()
     load_css()
     page = setup_sidebar()
     
@@ -0,0 +1,143 @@
+import re
+import math
+import difflib
+import threading
+import unicodedata
+import config
+from database import get_menu_items
+from menu_catalog import format_price
+
+# Words that say what the customer wants to know about a dish
+PRICE_WORDS = {"price", "prices", "cost", "costs", "much", "rate", "charge", "rs", "rupees", "inr"}
+CALORIE_WORDS = {"calorie", "calories", "kcal", "healthy"}
+DESCRIBE_WORDS = {"what", "whats", "describe", "contain", "contains", "ingredients", "made", "inside", "about", "tell"}
+AVAILABILITY_WORDS = {"have", "serve", "available", "offer", "get", "order", "menu"}
+INTENT_WORDS = PRICE_WORDS | CALORIE_WORDS | DESCRIBE_WORDS | AVAILABILITY_WORDS
+
+# Questions the catalog cannot answer safely; always left to the LLM
+BAIL_WORDS = {
+    "allergy", "allergies", "allergic", "allergen", "allergens", "nut", "nuts", "peanut", "peanuts",
+    "gluten", "dairy", "lactose", "shellfish", "vegan", "vegetarian", "nonveg", "jain", "halal", "kosher",
+    "spicy", "spice", "mild", "delivery", "deliver", "delivered", "takeaway", "takeout", "parcel", "zomato", "swiggy",
+}
+
+# Never treated as part of a dish name
+STOP_WORDS = {
+    "a", "an", "the", "is", "are", "of", "for", "in", "on", "to", "do", "does", "you", "your", "yours",
+    "i", "me", "my", "we", "can", "could", "please", "how", "it", "this", "that", "there", "any",
+    "dish", "dishes", "item", "plate", "portion", "one", "with", "and", "or", "s",
+    "hi", "hello", "hey", "thanks", "thank", "want", "would", "like", "know", "many", "per", "serving",
+}
+
+def tokenize(text):
+    """Lower-case ASCII word tokens of a question or dish name"""
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii").lower()
+    return re.findall(r"[a-z0-9]+", text)
+
+class MenuIndex:
+    """In-memory index of dish names for answering menu questions without the LLM.
+
+    Dish names are indexed by token. Question tokens are matched to name
+    tokens exactly or, for misspellings and run-together words, with
+    difflib. A dish scores the IDF-weighted share of its name the question
+    covers or, when the question names two or more dish words, the share
+    of those words the dish contains ("butter chicken"). A question with a
+    word that is neither an intent word nor part of the best dish's name,
+    e.g. a second dish, matches nothing.
+    """
+
+    def __init__(self, items, min_score=0.75, fuzzy_cutoff=0.8):
+        self.items = items
+        self.min_score = min_score
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self._names = [[t for t in tokenize(item["name"]) if t not in STOP_WORDS] for item in items]
+        self._postings = {}
+        for position, tokens in enumerate(self._names):
+            for token in set(tokens):
+                self._postings.setdefault(token, set()).add(position)
+        # Adjacent name words written as one, e.g. "makhanwala"
+        self._aliases = {}
+        for tokens in self._names:
+            for first, second in zip(tokens, tokens[1:]):
+                self._aliases.setdefault(first + second, (first, second))
+        self._vocabulary = list(self._postings) + [alias for alias in self._aliases if alias not in self._postings]
+        self._idf = {token: math.log(1 + len(items) / len(postings)) for token, postings in self._postings.items()}
+
+    def _token_matches(self, token):
+        """Name tokens a question token may stand for"""
+        if token in self._postings:
+            return {token}
+        if len(token) < 4:
+            return set()
+        matches = set()
+        for close in difflib.get_close_matches(token, self._vocabulary, n=3, cutoff=self.fuzzy_cutoff):
+            matches.update(self._aliases.get(close, (close,)) if close not in self._postings else (close,))
+        return matches
+
+    def match(self, question):
+        """Return (item, score) for the one dish a question is about, or (None, 0.0)"""
+        query = []
+        for token in tokenize(question):
+            if token not in STOP_WORDS and token not in INTENT_WORDS:
+                matches = self._token_matches(token)
+                if not matches:
+                    # Something the catalog knows nothing about
+                    return None, 0.0
+                query.append(matches)
+        matched = set().union(*query)
+
+        best, best_key = None, (0.0, 0.0)
+        for position in set().union(*(self._postings[token] for token in matched)):
+            tokens = set(self._names[position])
+            name_score = sum(self._idf[t] for t in tokens & matched) / sum(self._idf[t] for t in tokens)
+            query_score = sum(1 for matches in query if matches & tokens) / len(query) if len(query) > 1 else 0.0
+            # Ties go to the dish whose name is covered best, then the shorter name
+            key = (max(name_score, query_score), name_score)
+            if key > best_key or (key == best_key and len(tokens) < len(self._names[best])):
+                best, best_key = position, key
+        if best is None or best_key[0] < self.min_score:
+            return None, 0.0
+        # Every dish word must belong to this dish, or the question is about more than one
+        if not all(matches & set(self._names[best]) for matches in query):
+            return None, 0.0
+        return self.items[best], best_key[0]
+
+    def answer(self, question):
+        """Answer a price, calorie, description or availability question about one dish, or None"""
+        words = set(tokenize(question))
+        if (not words & INTENT_WORDS and "₹" not in question) or words & BAIL_WORDS:
+            return None
+        item, _ = self.match(question)
+        if item is None:
+            return None
+
+        name, price = item["name"], format_price(item["price_text"])
+        if words & PRICE_WORDS or "₹" in question:
+            return f"{name} is {price}."
+        if words & CALORIE_WORDS and item["calories"]:
+            return f"{name} is about {item['calories']} kcal per serving ({price})."
+        if words & DESCRIBE_WORDS and item["description"]:
+            return f"{name} ({item['category']}): {item['description'].rstrip('.')}. Price: {price}."
+        return f"Yes, {name} is on our {item['tab']} menu under {item['category']} for {price}."
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_menu_index():
+    """Return the process-wide menu index, built from the catalog on first use"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = MenuIndex(get_menu_items(), min_score=config.menu_match_threshold)
+    return _index
+
+def clear_menu_index():
+    """Drop the menu index so it is rebuilt from the updated catalog"""
+    global _index
+    with _index_lock:
+        _index = None
+
+def answer_menu_question(question):
+    """Answer a simple menu question straight from the catalog, or None to fall back to the LLM"""
+    return get_menu_index().answer(question)
@@ -0,0 +1,159 @@
+import re
+
+MENU_TABS = ["Appetizers", "Main Course", "Desserts", "Beverages"]
+
+# Boilerplate printed on every menu page
+_SKIP_PREFIXES = (
+    "list of allergens", "eggs fish", "crustaceans mustard", "kindly inform",
+    "all prices are", "vegetarian non-vegetarian", "lunch and dinner", "time-",
+)
+
+_PRICE = r"(\d{2,5}(?:\s*/\s*\d{2,5})*)"
+_ITEM_LINE = re.compile(r"^(?P<name>.*[A-Za-z].*?)\s+" + _PRICE + r"$")
+_DETAIL_LINE = re.compile(
+    r"^(?P<pre>.*?)\|?\s*(?P<kcal>\d+)\s*kcal\s*\|\s*(?P<gms>\d+)\s*gms?\s*\|?\s*(?P<rest>.*)$"
+)
+_PRICE_ONLY = re.compile(r"^\|?\s*" + _PRICE + r"\s*\|?$")
+# The menu font renders names and headings in small caps, which
+# pdfplumber extracts as mixed case such as "deSSerT" or "SouP"
+_SMALL_CAPS = re.compile(r"[a-z][A-Z]")
+
+def clean_name(text):
+    """Turn an extracted small-caps name like 'PunJaBi STyLe B aingan' into 'Punjabi Style Baingan'"""
+    tokens = text.replace("…", " ").strip(" |,").split()
+    merged = []
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        # Letters split off by the PDF's kerning: "B aingan", "noodLe S"
+        if len(token) == 1 and token.isupper() and token not in ("A", "I", "&"):
+            if i + 1 < len(tokens) and tokens[i + 1][:1].islower():
+                token = token + tokens[i + 1]
+                i += 1
+            elif merged:
+                merged[-1] += token
+                i += 1
+                continue
+        merged.append(token)
+        i += 1
+    return " ".join(word.capitalize() for word in merged)
+
+def _append_text(text, line):
+    """Append a wrapped line, re-joining words hyphenated across the break"""
+    if text.endswith("-") and line[:1].islower():
+        return text[:-1] + line
+    return f"{text} {line}" if text else line
+
+def tab_for_category(category):
+    """Map a menu section heading onto one of the menu page tabs"""
+    category = category.lower()
+    if "dessert" in category:
+        return "Desserts"
+    if any(word in category for word in ("beverage", "drink", "juice", "coffee", "tea", "wine", "mocktail")):
+        return "Beverages"
+    if any(word in category for word in ("soup", "appetizer", "short plates", "starter")):
+        return "Appetizers"
+    return "Main Course"
+
+def parse_price(price_text):
+    """Return the individual prices from text like '1200 / 1300'"""
+    return [int(value) for value in re.findall(r"\d+", price_text)]
+
+def format_price(price_text):
+    """Format stored price text like '1200 / 1300' for display as '₹1200 / ₹1300'"""
+    return " / ".join(f"₹{price}" for price in parse_price(price_text))
+
+def parse_menu_pages(pages):
+    """Parse menu page texts into items.
+
+    `pages` is an iterable of (page_number, text). Returns a list of dicts
+    with category, tab, name, description, price (lowest price), price_text,
+    calories and page.
+    """
+    lines = []
+    for page_number, text in pages:
+        for line in (text or "").splitlines():
+            line = line.strip()
+            if line and not line.lower().startswith(_SKIP_PREFIXES):
+                lines.append((page_number, line))
+
+    items = []
+    category = "Menu"
+    current = None
+    name_fragment = ""
+
+    def start_item(name, price_text, page_number):
+        item = {
+            "category": category,
+            "tab": tab_for_category(category),
+            "name": clean_name(name),
+            "description": "",
+            "price": min(parse_price(price_text)),
+            "price_text": " / ".join(str(price) for price in parse_price(price_text)),
+            "calories": None,
+            "page": page_number,
+            "detail": "",
+            "variants": [],
+        }
+        items.append(item)
+        return item
+
+    for index, (page_number, line) in enumerate(lines):
+        detail = _DETAIL_LINE.match(line)
+        if detail:
+            pre = detail.group("pre").strip(" |")
+            rest = detail.group("rest").strip(" |")
+            price_match = _PRICE_ONLY.match(rest) if rest else None
+            if pre and price_match:
+                # Name, calories and price on one line
+                current = start_item(f"{name_fragment} {pre}", price_match.group(1), page_number)
+                name_fragment = ""
+                rest = ""
+            elif pre and current is not None and current["calories"] is None:
+                # Second line of a name that ended with its price on the line above
+                current["name"] = clean_name(f"{current['name']} {pre}")
+            if current is None:
+                continue
+            if current["calories"] is None:
+                current["calories"] = int(detail.group("kcal"))
+                current["detail"] = rest
+            elif rest:
+                current["variants"].append(rest)
+            continue
+
+        item_line = _ITEM_LINE.match(line)
+        if item_line:
+            current = start_item(f"{name_fragment} {item_line.group('name')}", item_line.group(2), page_number)
+            name_fragment = ""
+            continue
+
+        if _SMALL_CAPS.search(line):
+            next_line = lines[index + 1][1] if index + 1 < len(lines) else ""
+            next_detail = _DETAIL_LINE.match(next_line)
+            if next_detail and next_detail.group("pre").strip(" |"):
+                # Name wraps onto the next line, which carries the price
+                name_fragment = line
+            else:
+                category = clean_name(line)
+                current = None
+            continue
+
+        if current is not None:
+            # Wrapped description text
+            if current["variants"]:
+                current["variants"][-1] = _append_text(current["variants"][-1], line)
+            elif current["calories"] is not None:
+                current["detail"] = _append_text(current["detail"], line)
+            else:
+                current["description"] = _append_text(current["description"], line)
+
+    # Items with several calorie lines are served in variants ("vegetable",
+    # "chicken", ...), each described on its own calorie line
+    for item in items:
+        detail, variants = item.pop("detail"), item.pop("variants")
+        if variants:
+            options = ", ".join(filter(None, [detail] + variants))
+            item["description"] = _append_text(item["description"], f"Options: {options}.")
+        elif detail:
+            item["description"] = _append_text(item["description"], detail)
+    return items
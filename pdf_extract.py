@@ -0,0 +1,124 @@
+import sys
+import types
+import threading
+import multiprocessing
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+import pdfplumber
+
+# Kept deliberately light: worker processes import this module, not utils
+_open_documents = {}
+_main_lock = threading.Lock()
+
+def count_pages(path):
+    """Return the number of pages in a PDF"""
+    with pdfplumber.open(path) as pdf:
+        return len(pdf.pages)
+
+def extract_page_text(path, page_index):
+    """Extract one page's text, reusing this worker's open handle on the file"""
+    pdf = _open_documents.get(path)
+    if pdf is None:
+        pdf = _open_documents[path] = pdfplumber.open(path)
+    return pdf.pages[page_index].extract_text()
+
+def _iter_serial(jobs):
+    """Extract pages in-process, opening each file once"""
+    current_path, pdf = None, None
+    try:
+        for path, page_index in jobs:
+            try:
+                if path != current_path:
+                    if pdf is not None:
+                        pdf.close()
+                    current_path, pdf = path, None
+                    pdf = pdfplumber.open(path)
+                yield pdf.pages[page_index].extract_text(), None
+            except Exception as e:
+                yield None, e
+    finally:
+        if pdf is not None:
+            pdf.close()
+
+def _worker_ready():
+    return True
+
+@contextmanager
+def _bare_main():
+    """Hide the app's __main__ from worker processes started inside the block.
+
+    Spawned workers re-import the parent's __main__ module. Under
+    `streamlit run` that is main.py, which would load Streamlit, CrewAI and
+    LangChain into every worker.
+    """
+    with _main_lock:
+        main_module = sys.modules.get('__main__')
+        sys.modules['__main__'] = types.ModuleType('__main__')
+        try:
+            yield
+        finally:
+            sys.modules['__main__'] = main_module
+
+def _start_pool(workers):
+    """Start a spawn-context process pool with all of its workers running"""
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    with _bare_main():
+        # Workers are spawned on demand by submit(), so start them all here
+        warmup = [pool.submit(_worker_ready) for _ in range(workers)]
+    for future in warmup:
+        future.result()
+    return pool
+
+def _iter_parallel(jobs, workers):
+    """Fan pages out to a process pool and yield results back in document order.
+
+    At most a few pages per worker are in flight, so finished pages never
+    pile up waiting for a slow consumer.
+    """
+    pool = _start_pool(workers)
+    pending = deque()
+    job_iter = iter(jobs)
+
+    def submit_next():
+        job = next(job_iter, None)
+        if job is not None:
+            pending.append(pool.submit(extract_page_text, *job))
+
+    try:
+        for _ in range(workers * 4):
+            submit_next()
+        while pending:
+            future = pending.popleft()
+            submit_next()
+            try:
+                yield future.result(), None
+            except Exception as e:
+                yield None, e
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+def iter_page_texts(paths, workers=1, progress=None, min_parallel_pages=0):
+    """Yield (path, page_number, text, error) for every page of every PDF, in order.
+
+    Pages are extracted in-process unless there are at least
+    `min_parallel_pages` of them and more than one worker is allowed.
+    A file that cannot be opened yields a single entry with page_number None.
+    `progress`, if given, is called as progress(pages_done, pages_total).
+    """
+    jobs = []
+    for path in paths:
+        try:
+            jobs.extend((path, page_index) for page_index in range(count_pages(path)))
+        except Exception as e:
+            yield path, None, None, e
+
+    if workers > 1 and len(jobs) > 1 and len(jobs) >= min_parallel_pages:
+        results = _iter_parallel(jobs, min(workers, len(jobs)))
+    else:
+        results = _iter_serial(jobs)
+
+    for done, ((path, page_index), (text, error)) in enumerate(zip(jobs, results), start=1):
+        if progress:
+            progress(done, len(jobs))
+        yield path, page_index + 1, text, error
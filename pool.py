@@ -0,0 +1,61 @@
+import queue
+import threading
+
+class ResourcePool:
+    """Thread-safe pool of reusable objects, created on demand up to `size`.
+
+    `create` builds a new object. Objects are handed out most recently used
+    first; when all `size` are checked out, acquire() waits up to `timeout`
+    seconds for one to be released and then raises TimeoutError.
+    """
+
+    def __init__(self, create, size, timeout=10, name="resource"):
+        self.create = create
+        self.size = size
+        self.timeout = timeout
+        self.name = name
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Check out an idle object, creating a new one while below the pool size"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                try:
+                    return self.create()
+                except Exception:
+                    self._created -= 1
+                    raise
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError(f"Timed out waiting for a free {self.name}") from None
+
+    def release(self, item):
+        """Return an object to the pool"""
+        self._idle.put(item)
+
+    def discard(self, item):
+        """Drop an object left in an unknown state so a fresh one is created in its place"""
+        with self._lock:
+            self._created -= 1
+        self.destroy(item)
+
+    def destroy(self, item):
+        """Clean up an object that leaves the pool; nothing to do by default"""
+
+    def close(self):
+        """Destroy every idle object"""
+        while True:
+            try:
+                self.destroy(self._idle.get_nowait())
+            except queue.Empty:
+                break
+        with self._lock:
+            self._created = 0
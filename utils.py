@@ -1,74 +1,408 @@
 import os
-import pdfplumber
 import re
+import json
+import shutil
+import hashlib
+import queue
+import tempfile
+import threading
+from datetime import datetime
 from dotenv import load_dotenv
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain.vectorstores import FAISS
+from langchain_community.vectorstores import FAISS
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 import streamlit as st
+import config
+from embedding_cache import EmbeddingCache
+from embedding_service import get_embedding_service
+from answer_cache import get_answer_cache
+from pdf_extract import iter_page_texts
+from menu_catalog import parse_menu_pages
+from database import replace_menu_items, delete_menu_items_except, count_menu_items, search_menu_items
+from menu_answers import clear_menu_index
+
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 2
 
 def load_environment():
     load_dotenv()
 
 def get_max_capacity():
     """Return the maximum restaurant capacity"""
-    # You can hardcode this value or store it in a configuration file
-    return 50  # Default restaurant capacity
+    # Set MAX_CAPACITY in the environment to change it (see config.py)
+    return config.max_capacity
+
+# ---------- KNOWLEDGE BASE STORE ----------
+def file_sha256(path):
+    """Return the SHA-256 hex digest of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def list_pdf_files(pdf_directory):
+    """Return the PDF file names in a directory in a stable order"""
+    return sorted(f for f in os.listdir(pdf_directory) if f.endswith('.pdf'))
+
+def text_sha256(text):
+    """Return the SHA-256 hex digest of a piece of text"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def build_manifest(files):
+    """Describe the source files, pages and settings a knowledge base is built from"""
+    return {
+        "version": MANIFEST_VERSION,
+        "embedding_model": config.embedding_model,
+        "normalize_embeddings": config.normalize_embeddings,
+        "chunk_size": config.chunk_size,
+        "chunk_overlap": config.chunk_overlap,
+        "files": files,
+        "built_at": datetime.now().isoformat(timespec="seconds"),
+    }
+
+def manifest_matches_embeddings(manifest):
+    """Return True if the stored vectors were produced by the configured embedding model"""
+    return (
+        manifest["embedding_model"] == config.embedding_model
+        and manifest.get("normalize_embeddings", False) == config.normalize_embeddings
+    )
+
+def manifest_is_compatible(manifest):
+    """Return True if an existing store can be updated in place with the current settings"""
+    return (
+        manifest is not None
+        and manifest.get("version") == MANIFEST_VERSION
+        and manifest_matches_embeddings(manifest)
+        and manifest["chunk_size"] == config.chunk_size
+        and manifest["chunk_overlap"] == config.chunk_overlap
+    )
+
+def read_manifest(store_dir=None):
+    """Read the manifest of the persisted knowledge base, or None if there is none or it is unreadable"""
+    path = os.path.join(store_dir or config.vector_store_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def save_knowledge_base(vectors, manifest, store_dir=None):
+    """Persist the FAISS index, docstore and manifest to disk"""
+    store_dir = os.path.abspath(store_dir or config.vector_store_dir)
+    # A private directory per save, so concurrent saves never touch each other's files
+    tmp_dir = tempfile.mkdtemp(dir=os.path.dirname(store_dir), prefix=os.path.basename(store_dir) + ".tmp-")
+    old_dir = tmp_dir + ".old"
+    try:
+        vectors.save_local(tmp_dir)
+        with open(os.path.join(tmp_dir, MANIFEST_FILE), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        # Swap directories so a loading process never sees a half-written store
+        if os.path.exists(store_dir):
+            os.replace(store_dir, old_dir)
+        os.replace(tmp_dir, store_dir)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+@st.cache_resource(show_spinner="Loading knowledge base...")
+def load_knowledge_base(store_dir=None):
+    """Load the persisted knowledge base once per process, shared read-only by all sessions.
+
+    Returns None if there is no usable store, including one that cannot be
+    read, so the app still starts and the store can be rebuilt.
+    """
+    store_dir = store_dir or config.vector_store_dir
+    manifest = read_manifest(store_dir)
+    if manifest is None or not manifest_matches_embeddings(manifest):
+        # Vectors from another model cannot be searched with query embeddings from this one
+        return None
 
-def initialize_knowledge_base():
-    """Initialize the knowledge base with restaurant data"""
     try:
-        from langchain.embeddings import HuggingFaceEmbeddings
-        from langchain.vectorstores import FAISS
-        from langchain.text_splitter import RecursiveCharacterTextSplitter
-        import pdfplumber
-        import os
-        import streamlit as st
-
-        embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-        pdf_directory = "restaurant_docs"
-        all_text = []
-
-        # Check if directory exists
-        if not os.path.exists(pdf_directory):
-            st.sidebar.error(f"Directory {pdf_directory} not found. Creating empty directory.")
-            os.makedirs(pdf_directory, exist_ok=True)
-            st.session_state.vector_ready = False
-            return
-
-        # List PDF files
-        pdf_files = [f for f in os.listdir(pdf_directory) if f.endswith('.pdf')]
-        if not pdf_files:
-            st.sidebar.error(f"No PDF files found in {pdf_directory}.")
-            st.session_state.vector_ready = False
-            return
-
-        # Extract text from PDFs
-        for pdf_file in pdf_files:
-            try:
-                with pdfplumber.open(os.path.join(pdf_directory, pdf_file)) as pdf:
-                    for page in pdf.pages:
-                        text = page.extract_text()
-                        if text:
-                            all_text.append(text)
-            except Exception as e:
-                st.sidebar.warning(f"Error processing {pdf_file}: {str(e)}")
-
-        if not all_text:
-            st.sidebar.error("No text extracted from PDFs. Please check the documents and retry.")
-            st.session_state.vector_ready = False
-            return
-
-        # Process text
-        combined_text = "\n".join(all_text)
-        text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-        final_documents = text_splitter.split_text(combined_text)
-        
-        # Create vector store
-        vectors = FAISS.from_texts(final_documents, embeddings)
-        st.session_state.vectors = vectors
-        st.session_state.vector_ready = True
-        st.sidebar.success("Knowledge Base Initialized!")
+        return read_vectors(store_dir, get_embedding_service())
+    except Exception as e:
+        st.sidebar.warning(f"Could not load the saved knowledge base ({e}). "
+                           "Use \"Rebuild from Scratch\" to rebuild it.")
+        return None
+
+def read_vectors(store_dir, embeddings):
+    """Read a private, writable copy of the persisted FAISS index"""
+    return FAISS.load_local(store_dir, embeddings, allow_dangerous_deserialization=True)
+
+@st.cache_data(ttl=60, show_spinner=False)
+def knowledge_base_is_stale(pdf_directory=None, store_dir=None):
+    """Return True if the PDFs on disk no longer match the persisted knowledge base"""
+    pdf_directory = pdf_directory or config.pdf_directory
+    manifest = read_manifest(store_dir)
+    if manifest is None or not os.path.exists(pdf_directory):
+        return manifest is None
+    if not manifest_is_compatible(manifest):
+        return True
+    current = {f: file_sha256(os.path.join(pdf_directory, f)) for f in list_pdf_files(pdf_directory)}
+    return current != {f: entry["sha256"] for f, entry in manifest["files"].items()}
+
+# ---------- MENU CATALOG ----------
+def is_menu_file(pdf_file):
+    """Return True if a PDF should be parsed into the menu catalog"""
+    return config.menu_file_pattern.lower() in pdf_file.lower()
+
+def sync_menu_catalog(pdf_directory, pdf_files, parsed_pages):
+    """Bring the menu catalog in line with the menu PDFs on disk.
+
+    Rows from menu files no longer in `pdf_files` are deleted.
+    `parsed_pages` maps re-ingested menu files to the (page_number, text)
+    pages already extracted for the knowledge base, so those are not read
+    again. Menu files with no catalog rows yet are extracted here.
+    """
+    menu_files = [pdf_file for pdf_file in pdf_files if is_menu_file(pdf_file)]
+    updated = delete_menu_items_except(menu_files) > 0
+    for pdf_file in menu_files:
+        pages = parsed_pages.get(pdf_file)
+        if pages is None:
+            if count_menu_items(pdf_file):
+                continue
+            path = os.path.join(pdf_directory, pdf_file)
+            pages = [(page_number, text) for _, page_number, text, error in iter_page_texts([path])
+                     if error is None and text]
+        replace_menu_items(pdf_file, parse_menu_pages(sorted(pages)))
+        updated = True
+    if updated:
+        get_menu_page.clear()
+        clear_menu_index()
+
+@st.cache_data(show_spinner=False)
+def get_menu_page(tab, search='', page=0, page_size=None):
+    """Return (items, total) for one page of a menu tab, cached until the next ingest"""
+    page_size = page_size or config.menu_page_size
+    return search_menu_items(tab, search.strip(), limit=page_size, offset=page * page_size)
+
+# ---------- INGESTION ----------
+def chunk_page(text_splitter, pdf_file, page_number, text):
+    """Split one page into chunks with stable vector ids and source metadata"""
+    page_hash = text_sha256(text)
+    chunks = text_splitter.split_text(text)
+    ids = [f"{pdf_file}:{page_number}:{page_hash[:16]}:{i}" for i in range(len(chunks))]
+    metadatas = [{"source": pdf_file, "page": page_number} for _ in chunks]
+    return page_hash, chunks, ids, metadatas
+
+def diff_sources(pdf_directory, pdf_files, manifest):
+    """Split the PDFs into files unchanged since the last build and files to re-ingest"""
+    old_files = manifest["files"] if manifest else {}
+    unchanged, changed = {}, {}
+    for pdf_file in pdf_files:
+        file_hash = file_sha256(os.path.join(pdf_directory, pdf_file))
+        old_entry = old_files.get(pdf_file)
+        if old_entry and old_entry["sha256"] == file_hash:
+            unchanged[pdf_file] = old_entry
+        else:
+            changed[pdf_file] = file_hash
+    removed = [pdf_file for pdf_file in old_files if pdf_file not in pdf_files]
+    return unchanged, changed, removed
+
+def run_embed_stage(batches, embeddings, vectors, result):
+    """Embed chunk batches from a queue and add them to the index until a None sentinel.
+
+    After an error the stage keeps draining the queue so the producer never
+    blocks on a full queue; the error is reported through `result`.
+    """
+    while True:
+        batch = batches.get()
+        if batch is None:
+            break
+        if "error" in result:
+            continue
+        texts, metadatas, ids = batch
+        try:
+            text_embeddings = list(zip(texts, embeddings.embed_documents(texts)))
+            if vectors is None:
+                vectors = FAISS.from_embeddings(text_embeddings, embeddings, metadatas=metadatas, ids=ids)
+            else:
+                vectors.add_embeddings(text_embeddings, metadatas=metadatas, ids=ids)
+            result["chunks"] += len(texts)
+        except Exception as e:
+            result["error"] = e
+    result["vectors"] = vectors
+
+def stream_ingest(pdf_directory, changed, manifest, text_splitter, embeddings, vectors, progress=None, on_page=None):
+    """Stream changed PDFs through extract -> split -> batch embed -> add to index.
+
+    Pages are chunked on this thread as they arrive from the extraction pool
+    while a background thread embeds full batches, with a bounded queue in
+    between, so peak memory depends on the batch size rather than the corpus.
+    Only pages whose text changed since the last build are re-chunked.
+    Returns (files, vectors, chunks_embedded, stale_ids) where `files` holds
+    the manifest entries of the changed files and `stale_ids` the vectors
+    they replace, which the caller deletes. `on_page`, if given, is called
+    as on_page(pdf_file, page_number, text) for every extracted page.
+    """
+    old_files = manifest["files"] if manifest else {}
+    batches = queue.Queue(maxsize=config.ingest_queue_batches)
+    result = {"chunks": 0}
+    embed_thread = threading.Thread(target=run_embed_stage, args=(batches, embeddings, vectors, result), daemon=True)
+    embed_thread.start()
+
+    pages = {pdf_file: {} for pdf_file in changed}
+    added_ids = {pdf_file: [] for pdf_file in changed}
+    failed = set()
+    batch = ([], [], [])
+    try:
+        paths = [os.path.join(pdf_directory, pdf_file) for pdf_file in changed]
+        for path, page_number, text, error in iter_page_texts(paths, config.extract_workers, progress, config.extract_parallel_min_pages):
+            pdf_file = os.path.basename(path)
+            if pdf_file in failed:
+                continue
+            if error is not None:
+                st.sidebar.warning(f"Error processing {pdf_file}: {str(error)}")
+                failed.add(pdf_file)
+                continue
+            if not text:
+                continue
+            if on_page:
+                on_page(pdf_file, page_number, text)
+
+            key = str(page_number)
+            old_pages = old_files[pdf_file]["pages"] if pdf_file in old_files else {}
+            if key in old_pages and old_pages[key]["sha256"] == text_sha256(text):
+                pages[pdf_file][key] = old_pages[key]
+                continue
+            page_hash, page_chunks, page_ids, page_metadatas = chunk_page(text_splitter, pdf_file, page_number, text)
+            pages[pdf_file][key] = {"sha256": page_hash, "ids": page_ids}
+            added_ids[pdf_file].extend(page_ids)
+            for part, values in zip(batch, (page_chunks, page_metadatas, page_ids)):
+                part.extend(values)
+            if len(batch[0]) >= config.ingest_batch_size:
+                batches.put(batch)
+                batch = ([], [], [])
+        if batch[0]:
+            batches.put(batch)
+    finally:
+        batches.put(None)
+        embed_thread.join()
+    if "error" in result:
+        raise result["error"]
+
+    files, stale_ids = {}, []
+    for pdf_file in changed:
+        old_entry = old_files.get(pdf_file)
+        if pdf_file in failed:
+            # Keep serving the previous version of a file that can no longer be parsed
+            stale_ids.extend(added_ids[pdf_file])
+            if old_entry:
+                files[pdf_file] = old_entry
+            continue
+        if old_entry:
+            for key, old_page in old_entry["pages"].items():
+                if pages[pdf_file].get(key) is not old_page:
+                    stale_ids.extend(old_page["ids"])
+        files[pdf_file] = {"sha256": changed[pdf_file], "pages": pages[pdf_file]}
+    return files, result["vectors"], result["chunks"], stale_ids
+
+_build_lock = threading.Lock()
+
+def initialize_knowledge_base(incremental=True):
+    """Build or update the knowledge base from restaurant data and persist it for all sessions.
+
+    With incremental=True an existing compatible store is updated in place,
+    so only new or changed pages are extracted and embedded. Builds started
+    from several sessions run one after another.
+    """
+    if not _build_lock.acquire(blocking=False):
+        with st.sidebar, st.spinner("Waiting for another knowledge base build to finish..."):
+            _build_lock.acquire()
+    try:
+        build_knowledge_base(incremental)
+    finally:
+        _build_lock.release()
+
+def build_knowledge_base(incremental):
+    """Run one knowledge base build; the caller holds the build lock"""
+    try:
+        # Chunks embedded by an earlier build are served from the on-disk cache
+        embedding_service = get_embedding_service()
+        stats_before = embedding_service.stats()
+        embeddings = EmbeddingCache(
+            embedding_service,
+            embedding_service.cache_name,
+            config.embedding_cache_dir,
+            config.embedding_cache_size,
+        )
+        # Builds take turns on the cache; leaving the block writes newly cached
+        # chunk embeddings once, even if the build failed part-way
+        with embeddings:
+            pdf_directory = config.pdf_directory
+
+            # Check if directory exists
+            if not os.path.exists(pdf_directory):
+                st.sidebar.error(f"Directory {pdf_directory} not found. Creating empty directory.")
+                os.makedirs(pdf_directory, exist_ok=True)
+                st.session_state.vector_ready = False
+                return
+
+            # List PDF files
+            pdf_files = list_pdf_files(pdf_directory)
+            if not pdf_files:
+                st.sidebar.error(f"No PDF files found in {pdf_directory}.")
+                sync_menu_catalog(pdf_directory, [], {})
+                st.session_state.vector_ready = False
+                return
+
+            manifest = read_manifest()
+            if not (incremental and manifest_is_compatible(manifest)) or load_knowledge_base() is None:
+                # A store that cannot be loaded is rebuilt from scratch
+                manifest = None
+
+            unchanged, changed, removed = diff_sources(pdf_directory, pdf_files, manifest)
+            if manifest and not changed and not removed:
+                sync_menu_catalog(pdf_directory, pdf_files, {})
+                st.session_state.vector_ready = load_knowledge_base() is not None
+                st.sidebar.success("Knowledge Base is already up to date.")
+                return
+
+            # Stream only what changed since the last build into a private copy of the index
+            vectors = read_vectors(config.vector_store_dir, embeddings) if manifest else None
+            text_splitter = RecursiveCharacterTextSplitter(chunk_size=config.chunk_size, chunk_overlap=config.chunk_overlap)
+            progress_bar = st.sidebar.progress(0.0, text="Extracting pages...")
+            def report_progress(done, total):
+                progress_bar.progress(done / total, text=f"Processed {done}/{total} pages")
+            menu_pages = {}
+            def collect_menu_page(pdf_file, page_number, text):
+                if is_menu_file(pdf_file):
+                    menu_pages.setdefault(pdf_file, []).append((page_number, text))
+            files, vectors, chunks_embedded, stale_ids = stream_ingest(
+                pdf_directory, changed, manifest, text_splitter, embeddings, vectors, report_progress, collect_menu_page
+            )
+            progress_bar.empty()
+
+            files.update(unchanged)
+            for pdf_file in removed:
+                for old_page in manifest["files"][pdf_file]["pages"].values():
+                    stale_ids.extend(old_page["ids"])
+
+            if not any(page["ids"] for entry in files.values() for page in entry["pages"].values()):
+                st.sidebar.error("No text extracted from PDFs. Please check the documents and retry.")
+                st.session_state.vector_ready = False
+                return
+
+            if stale_ids:
+                vectors.delete(stale_ids)
+            save_knowledge_base(vectors, build_manifest({f: files[f] for f in sorted(files)}))
+
+            # Menu files that failed part-way keep their previous catalog entries
+            parsed = {f: pages for f, pages in menu_pages.items() if files.get(f, {}).get("sha256") == changed[f]}
+            sync_menu_catalog(pdf_directory, pdf_files, parsed)
+
+            # Drop the cached copy so every session picks up the new index
+            load_knowledge_base.clear()
+            knowledge_base_is_stale.clear()
+            get_answer_cache().clear()
+            st.session_state.vector_ready = load_knowledge_base() is not None
+            stats_after = embedding_service.stats()
+            seconds = stats_after["seconds"] - stats_before["seconds"]
+            throughput = round((stats_after["texts"] - stats_before["texts"]) / seconds, 1) if seconds else 0.0
+            st.sidebar.success(f"Knowledge Base Initialized! Embedded {chunks_embedded} chunks "
+                               f"({embeddings.hits} from cache, {throughput} chunks/s), removed {len(stale_ids)}.")
     except Exception as e:
         st.sidebar.error(f"Error initializing knowledge base: {str(e)}")
         st.session_state.vector_ready = False